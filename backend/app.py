@@ -4,9 +4,16 @@ from dotenv import load_dotenv
 import os
 import uvicorn
 import asyncio
-from services.news_collector import NewsCollector
+from contextlib import asynccontextmanager
+from services.news_collector import NewsCollector, cancel_collection, shutdown_parse_pool
 from services.news_processor import NewsProcessor
-from database.mongodb import create_indexes
+from services.hot_store import hot_store
+from services.personalized_feed import personalized_feed
+from services.trend_detector import trend_detector
+from services.vector_index import vector_index
+from services.news_archiver import NewsArchiver
+from services.reprocessor import Reprocessor
+from database.mongodb import connect_to_mongodb, close_mongodb_connection, ensure_indexes_in_background
 import logging
 # Load environment variables
 load_dotenv()
@@ -14,7 +21,55 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Insight Sphere API", description="AI-powered news aggregator API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await connect_to_mongodb()
+    app.state.index_task = ensure_indexes_in_background()
+
+    news_collector = NewsCollector()
+    app.state.news_collector_task = asyncio.create_task(news_collector.start_collection_scheduler())
+    
+    news_processor = NewsProcessor()
+    logger.info("Launching news processor loop...")
+    app.state.news_processor_task = asyncio.create_task(news_processor.start_processing_loop(interval=300))
+
+    reprocessor = Reprocessor(news_processor)
+    app.state.reprocessor_task = asyncio.create_task(reprocessor.start_sweep_loop())
+
+    app.state.hot_store_task = asyncio.create_task(hot_store.start_refresh_loop())
+    app.state.personalized_feed_task = asyncio.create_task(personalized_feed.start_refresh_loop())
+    app.state.trend_detector_task = asyncio.create_task(trend_detector.start_tick_loop())
+    app.state.vector_index_task = asyncio.create_task(vector_index.start_maintenance_loop())
+
+    news_archiver = NewsArchiver()
+    app.state.news_archiver_task = asyncio.create_task(news_archiver.start_archive_loop())
+
+    background_tasks = [
+        app.state.index_task,
+        app.state.news_collector_task,
+        app.state.news_processor_task,
+        app.state.reprocessor_task,
+        app.state.hot_store_task,
+        app.state.personalized_feed_task,
+        app.state.trend_detector_task,
+        app.state.vector_index_task,
+        app.state.news_archiver_task,
+    ]
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await cancel_collection()
+    try:
+        await trend_detector.save_checkpoint()
+    except Exception as e:
+        logger.error(f"Failed to checkpoint trend state on shutdown: {e}")
+    await vector_index.save()
+    shutdown_parse_pool()
+    await close_mongodb_connection()
+
+app = FastAPI(title="Insight Sphere API", description="AI-powered news aggregator API", lifespan=lifespan)
 
 origins = [
     "https://insight-sphere.netlify.app",
@@ -30,25 +85,13 @@ app.add_middleware(
 )
 
 # Import routers
-from routers import news, analysis, auth
+from routers import news, analysis, auth, alerts
 
 # Include routers
 app.include_router(news.router, prefix="/api/news", tags=["News"])
 app.include_router(analysis.router, prefix="/api/analysis", tags=["Analysis"])
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
-
-@app.on_event("startup")
-async def startup_event():
-    await create_indexes()
-    
-    news_collector = NewsCollector()
-    app.state.news_collector_task = asyncio.create_task(news_collector.start_collection_scheduler())
-    asyncio.create_task(news_collector.collect_news())
-    
-    news_processor = NewsProcessor()
-    logger.info("Launching news processor loop...")
-    app.state.news_processor_task = asyncio.create_task(news_processor.start_processing_loop(interval=300))
-
+app.include_router(alerts.router, prefix="/api/alerts", tags=["Alerts"])
 
 @app.get("/")
 async def root():
@@ -0,0 +1,108 @@
+"""
+Compare per-response serialization cost of the article list endpoints.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_serialization [--articles 100] [--rounds 200]
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from models.news import NewsArticle
+from services.hot_store import HotArticleStore
+from services.serialization import article_list_response
+
+LABELS = ["GPE", "ORG", "PERSON", "NORP", "DATE", "LOC"]
+WORDS = ["India", "government", "market", "election", "minister", "talks", "storm", "league", "Delhi", "court"]
+
+
+def make_article(i: int) -> dict:
+    title = " ".join(random.choices(WORDS, k=10))
+    description = " ".join(random.choices(WORDS, k=40))
+    entities = []
+    for _ in range(random.randint(3, 12)):
+        start = random.randint(0, 200)
+        entities.append({
+            "text": random.choice(WORDS),
+            "label": random.choice(LABELS),
+            "start": start,
+            "end": start + 6
+        })
+    return {
+        "_id": ObjectId(),
+        "title": title,
+        "description": description,
+        "url": f"https://example.com/news/{i}",
+        "published_at": datetime(2025, 1, 1) + timedelta(minutes=i),
+        "source": "example.com",
+        "content": "",
+        "author": "",
+        "image_url": f"https://example.com/img/{i}.jpg",
+        "category": "world",
+        "entities": entities,
+        "sentiment": {"positive": 0.4, "negative": 0.2, "neutral": 0.4},
+        "processed_at": datetime(2025, 1, 2)
+    }
+
+
+def bench(label: str, func, rounds: int):
+    func()  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"{label:<40} {elapsed * 1000:8.3f} ms/response")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    docs = [make_article(i) for i in range(args.articles)]
+    field = create_response_field(name="response", type_=List[NewsArticle])
+    loop = asyncio.new_event_loop()
+
+    def response_model_path():
+        # What FastAPI does for `response_model=List[NewsArticle]`
+        content = loop.run_until_complete(serialize_response(field=field, response_content=docs))
+        return JSONResponse(content=content).body
+
+    # The fast paths include entities so they produce the same body as response_model
+    def orjson_path():
+        return article_list_response(docs, include_entities=True).body
+
+    def orjson_compact_path():
+        return article_list_response(docs, compact=True, include_entities=True).body
+
+    store = HotArticleStore(capacity=len(docs))
+    for doc in docs:
+        store.upsert(doc)
+    records = list(store._all.records)
+
+    def hot_store_path():
+        return store.render(records, include_entities=True)
+
+    print(f"{args.articles} articles per response, {args.rounds} rounds")
+    baseline = bench("response_model + jsonable_encoder", response_model_path, args.rounds)
+    for label, func in (
+        ("orjson projection", orjson_path),
+        ("orjson projection (compact)", orjson_compact_path),
+        ("hot store fragments", hot_store_path),
+    ):
+        elapsed = bench(label, func, args.rounds)
+        print(f"{'':<40} {baseline / elapsed:8.1f}x faster")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # mongodb.py
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference, TEXT
 import os
 from dotenv import load_dotenv
 import logging
@@ -15,74 +16,148 @@ load_dotenv()
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "insightsphere")
 
+# Connection pool and timeout settings
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "5"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "10000"))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "30000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+# Read preference for the heavy /api/analysis aggregations
+MONGODB_ANALYTICS_READ_PREFERENCE = os.getenv("MONGODB_ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
 # Global variables for database connection
 client = None
 db = None
+analytics_db = None
+_connect_lock = asyncio.Lock()
+_indexes_created = False
 
 async def connect_to_mongodb():
     """
-    Connect to MongoDB, verify the connection, and create necessary indexes.
+    Connect to MongoDB and verify the connection.
+
+    Safe to call more than once; only the first call creates a client.
+    Indexes are not created here, see ensure_indexes_in_background().
     """
-    global client, db
-    try:
-        client = AsyncIOMotorClient(MONGODB_URL)
-        db = client[DATABASE_NAME]
-        # Verify the connection by issuing a ping command.
-        await db.command("ping")
-        logger.info("Connected to MongoDB successfully")
-        
-        # Create indexes after establishing the connection.
-        await create_indexes()
-        
-    except Exception as e:
-        logger.error(f"Failed to connect to MongoDB: {e}")
-        raise
+    global client, db, analytics_db
+    async with _connect_lock:
+        if db is not None:
+            return
+        try:
+            client = AsyncIOMotorClient(
+                MONGODB_URL,
+                maxPoolSize=MONGODB_MAX_POOL_SIZE,
+                minPoolSize=MONGODB_MIN_POOL_SIZE,
+                connectTimeoutMS=MONGODB_CONNECT_TIMEOUT_MS,
+                socketTimeoutMS=MONGODB_SOCKET_TIMEOUT_MS,
+                serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            )
+            # Verify the connection by issuing a ping command.
+            await client[DATABASE_NAME].command("ping")
+            db = client[DATABASE_NAME]
+            analytics_db = client.get_database(
+                DATABASE_NAME,
+                read_preference=READ_PREFERENCES[MONGODB_ANALYTICS_READ_PREFERENCE]
+            )
+            logger.info(
+                f"Connected to MongoDB successfully (pool {MONGODB_MIN_POOL_SIZE}-{MONGODB_MAX_POOL_SIZE}, "
+                f"analytics reads: {MONGODB_ANALYTICS_READ_PREFERENCE})"
+            )
+        except Exception as e:
+            logger.error(f"Failed to connect to MongoDB: {e}")
+            if client is not None:
+                client.close()
+                client = None
+            raise
 
 async def close_mongodb_connection():
     """
     Close MongoDB connection.
     """
-    global client
+    global client, db, analytics_db
     if client:
         client.close()
+        client = None
+        db = None
+        analytics_db = None
         logger.info("MongoDB connection closed")
 
 async def get_database():
     """
     Ensure the database connection is established. Returns the connected database.
     """
-    global db
     if db is None:
         await connect_to_mongodb()
     return db
 
+async def get_analytics_database():
+    """
+    Database handle for analytics queries, routed according to
+    MONGODB_ANALYTICS_READ_PREFERENCE (secondaries when available by default).
+    """
+    if analytics_db is None:
+        await connect_to_mongodb()
+    return analytics_db
+
 async def create_indexes():
     """
-    Create necessary indexes for collections using an initialized database instance.
-    Note: This function retrieves the database via get_database() to ensure that a valid
-    connection is available.
+    Create necessary indexes for collections. Index creation is idempotent on the
+    server, and repeated calls within a process return immediately.
     """
+    global _indexes_created
+    if _indexes_created:
+        return
     database = await get_database()  # Guarantees that the database has been initialized.
     try:
         await database.users.create_index("username", unique=True)
         await database.users.create_index("email", unique=True)
-        
+
         await database.news.create_index("url", unique=True)
         await database.news.create_index("published_at")
         await database.news.create_index("category")
+        await database.news.create_index("processed_at")
+        await database.news.create_index([("title", TEXT), ("description", TEXT)])
+        await database.news.create_index([("language", 1), ("published_at", -1)])
+
+        await database.entities.create_index("key", unique=True)
+        await database.user_events.create_index([("user_id", 1), ("created_at", -1)])
+        await database.saved_queries.create_index("user_id")
+        await database.notifications.create_index([("user_id", 1), ("created_at", -1)])
+        await database.notifications.create_index([("query_id", 1), ("article_id", 1)], unique=True)
+        _indexes_created = True
         logger.info("Database indexes created successfully")
     except Exception as e:
         logger.error(f"Failed to create indexes: {e}")
-        raise 
+        raise
+
+def ensure_indexes_in_background() -> asyncio.Task:
+    """
+    Build indexes without holding up startup. Failures are logged rather than
+    raised, since the API can serve (more slowly) without them.
+    """
+    async def build():
+        try:
+            await create_indexes()
+        except Exception:
+            pass  # Already logged by create_indexes
+
+    return asyncio.create_task(build())
 
 # Example initialization entry point.
 # This block will run when you execute `python mongodb.py` directly.
 async def main():
     await connect_to_mongodb()
+    await create_indexes()
     logger.info("MongoDB setup is complete.")
-    # If needed, you can perform additional operations here.
-    # Optionally, close the connection once done:
-    # await close_mongodb_connection()
+    await close_mongodb_connection()
 
 if __name__ == "__main__":
     asyncio.run(main())
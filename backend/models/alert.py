@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field, root_validator
+from typing import List, Optional
+from datetime import datetime
+
+class SavedQueryCreate(BaseModel):
+    """
+    A saved search. Every keyword and entity must match, and when categories
+    or sources are given the article must be in one of them.
+    """
+    name: str = Field(..., min_length=1, max_length=100)
+    keywords: List[str] = Field(default_factory=list, max_items=10)
+    entities: List[str] = Field(default_factory=list, max_items=10)
+    categories: List[str] = Field(default_factory=list, max_items=10)
+    sources: List[str] = Field(default_factory=list, max_items=10)
+
+    @root_validator(skip_on_failure=True)
+    def require_condition(cls, values):
+        if not any(values.get(field) for field in ("keywords", "entities", "categories", "sources")):
+            raise ValueError("A saved query needs at least one keyword, entity, category or source")
+        return values
+
+class SavedQueryResponse(SavedQueryCreate):
+    id: str
+    created_at: datetime
+
+class NotificationResponse(BaseModel):
+    id: str
+    type: str = "info"
+    message: str
+    query_id: str
+    query_name: str
+    article_id: str
+    title: str
+    url: str
+    published_at: Optional[datetime] = None
+    read: bool = False
+    created_at: datetime
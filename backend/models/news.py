@@ -22,6 +22,7 @@ class NewsArticle(BaseModel):
     content: Optional[str] = None
     author: Optional[str] = None
     image_url: Optional[str] = None
+    language: Optional[str] = None
     category: Optional[str] = None
     entities: Optional[List[Entity]] = None
     sentiment: Optional[Sentiment] = None
@@ -0,0 +1,107 @@
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import List
+from bson import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime
+from models.alert import SavedQueryCreate, SavedQueryResponse, NotificationResponse
+from models.user import UserInDB
+from database.mongodb import get_database
+from routers.auth import get_current_active_user
+from services.alert_matcher import alert_matcher, CompiledQuery, MAX_SAVED_QUERIES_PER_USER
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+def _object_id(value: str, detail: str) -> ObjectId:
+    try:
+        return ObjectId(value)
+    except InvalidId:
+        raise HTTPException(status_code=404, detail=detail)
+
+def _saved_query_response(doc) -> SavedQueryResponse:
+    return SavedQueryResponse(id=str(doc["_id"]), **{k: v for k, v in doc.items() if k != "_id"})
+
+def _notification_response(doc) -> NotificationResponse:
+    return NotificationResponse(
+        id=str(doc["_id"]),
+        message=f"{doc['query_name']}: {doc['title']}",
+        **{k: v for k, v in doc.items() if k not in ("_id", "user_id")}
+    )
+
+@router.post("/queries", response_model=SavedQueryResponse)
+async def create_saved_query(
+    saved_query: SavedQueryCreate,
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """Save a search; newly processed articles matching it create notifications"""
+    db = await get_database()
+    if await db.saved_queries.count_documents({"user_id": current_user.id}) >= MAX_SAVED_QUERIES_PER_USER:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SAVED_QUERIES_PER_USER} saved queries per user")
+
+    doc = saved_query.dict()
+    doc.update({"user_id": current_user.id, "created_at": datetime.now()})
+    if not CompiledQuery({"_id": None, **doc}).anchors:
+        raise HTTPException(status_code=400, detail="Saved query has no searchable terms")
+
+    result = await db.saved_queries.insert_one(doc)
+    doc["_id"] = result.inserted_id
+    alert_matcher.add(doc)
+    logger.info(f"Saved query '{saved_query.name}' for {current_user.username}")
+    return _saved_query_response(doc)
+
+@router.get("/queries", response_model=List[SavedQueryResponse])
+async def list_saved_queries(current_user: UserInDB = Depends(get_current_active_user)):
+    """List the current user's saved searches"""
+    db = await get_database()
+    docs = await db.saved_queries.find({"user_id": current_user.id}).sort("created_at", -1).to_list(
+        length=MAX_SAVED_QUERIES_PER_USER
+    )
+    return [_saved_query_response(doc) for doc in docs]
+
+@router.delete("/queries/{query_id}")
+async def delete_saved_query(
+    query_id: str,
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """Delete one of the current user's saved searches"""
+    db = await get_database()
+    object_id = _object_id(query_id, "Saved query not found")
+    result = await db.saved_queries.delete_one({"_id": object_id, "user_id": current_user.id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Saved query not found")
+    alert_matcher.remove(query_id)
+    return {"detail": "Saved query deleted"}
+
+@router.get("/notifications", response_model=List[NotificationResponse])
+async def list_notifications(
+    limit: int = Query(50, ge=1, le=100),
+    unread_only: bool = False,
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """Get the current user's most recent alert notifications"""
+    db = await get_database()
+    query = {"user_id": current_user.id}
+    if unread_only:
+        query["read"] = False
+    docs = await db.notifications.find(query).sort("created_at", -1).limit(limit).to_list(length=limit)
+    return [_notification_response(doc) for doc in docs]
+
+@router.post("/notifications/{notification_id}/read")
+async def mark_notification_read(
+    notification_id: str,
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """Mark one notification as read"""
+    db = await get_database()
+    object_id = _object_id(notification_id, "Notification not found")
+    result = await db.notifications.update_one(
+        {"_id": object_id, "user_id": current_user.id},
+        {"$set": {"read": True}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return {"detail": "Notification marked as read"}
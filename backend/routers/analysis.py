@@ -2,7 +2,9 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from services.news_processor import NewsProcessor
-from database.mongodb import get_database
+from services.entity_dictionary import entity_dictionary
+from services.trend_detector import trend_detector
+from database.mongodb import get_analytics_database
 
 router = APIRouter()
 news_processor = NewsProcessor()
@@ -15,7 +17,7 @@ async def get_sentiment_trends(
 ):
     """Get sentiment trends over time"""
     try:
-        db = await get_database()
+        db = await get_analytics_database()
         query = {
             "published_at": {
                 "$gte": datetime.now() - timedelta(days=days)
@@ -75,41 +77,56 @@ async def get_top_entities(
 ):
     """Get most frequently mentioned entities"""
     try:
-        db = await get_database()
-        query = {}
+        db = await get_analytics_database()
+        query = {"entity_refs.0": {"$exists": True}}
         if category:
             query["category"] = category
 
-        articles = await db.news.find(query).to_list(length=None)
-        
-        # Count entity occurrences
-        entity_counts = {}
-        for article in articles:
-            if "entities" in article:
-                for entity in article["entities"]:
-                    key = f"{entity['text']} ({entity['label']})"
-                    if key not in entity_counts:
-                        entity_counts[key] = 0
-                    entity_counts[key] += 1
+        # Count entity occurrences by dictionary ID inside Mongo
+        pipeline = [
+            {"$match": query},
+            {"$project": {"entity_refs": 1}},
+            {"$unwind": "$entity_refs"},
+            {
+                "$group": {
+                    "_id": {"$arrayElemAt": ["$entity_refs", 0]},
+                    "count": {"$sum": 1}
+                }
+            },
+            {"$sort": {"count": -1}},
+            {"$limit": limit}
+        ]
+        results = await db.news.aggregate(pipeline).to_list(length=limit)
 
-        # Sort and get top entities
-        top_entities = sorted(
-            [{"entity": k, "count": v} for k, v in entity_counts.items()],
-            key=lambda x: x["count"],
-            reverse=True
-        )[:limit]
+        await entity_dictionary.prefetch(r["_id"] for r in results)
+        top_entities = []
+        for r in results:
+            entry = entity_dictionary.lookup(r["_id"])
+            if entry is not None:
+                top_entities.append({"entity": f"{entry[0]} ({entry[1]})", "count": r["count"]})
 
         return {"top_entities": top_entities}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/trending")
+async def get_trending_entities(
+    window: str = Query("1h", pattern="^(5m|1h)$"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Get entities whose mentions are spiking above their usual rate"""
+    return {
+        "window": window,
+        "trending": trend_detector.trending(window, limit)
+    }
+
 @router.get("/categories/distribution")
 async def get_category_distribution(
     days: int = Query(7, ge=1, le=30)
 ):
     """Get distribution of articles across categories"""
     try:
-        db = await get_database()
+        db = await get_analytics_database()
         pipeline = [
             {
                 "$match": {
@@ -143,7 +160,7 @@ async def get_source_analysis(
 ):
     """Get analysis of news sources"""
     try:
-        db = await get_database()
+        db = await get_analytics_database()
         pipeline = [
             {
                 "$match": {
@@ -1,10 +1,22 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime, timedelta
 from services.news_collector import NewsCollector
 from services.news_processor import NewsProcessor
+from services.hot_store import hot_store
+from services.entity_dictionary import entity_dictionary
+from services.personalized_feed import personalized_feed
+from services.vector_index import vector_index
+from services.news_archiver import find_articles
+from services.exporter import build_export_query, export_tiers, iter_ndjson
+from services.serialization import ArticleListResponse, article_list_response
 from models.news import NewsArticle, NewsResponse
+from models.user import UserInDB
 from database.mongodb import get_database
+from routers.auth import get_current_active_user
 import logging
 
 # Configure logging
@@ -19,17 +31,27 @@ news_processor = NewsProcessor()
 async def get_latest_news(
     limit: int = Query(50, ge=1, le=100),
     category: Optional[str] = None,
-    source: Optional[str] = None
+    source: Optional[str] = None,
+    language: Optional[str] = Query(None, description="ISO 639-1 language code, e.g. en or hi"),
+    include_entities: bool = Query(False, description="Expand entity references into entity objects"),
+    compact: bool = Query(False, description="Omit entity character offsets")
 ):
     """Get latest news articles with optional filtering"""
     try:
-        logger.info(f"Fetching latest news (limit: {limit}, category: {category}, source: {source})")
+        logger.info(f"Fetching latest news (limit: {limit}, category: {category}, source: {source}, language: {language})")
+        records = hot_store.latest(limit, category=category, source=source, language=language)
+        if records:
+            logger.info(f"Serving {len(records)} articles from hot store")
+            return ArticleListResponse(content=hot_store.render(records, compact, include_entities))
+
         db = await get_database()
         query = {}
         if category:
             query["category"] = category
         if source:
             query["source"] = source
+        if language:
+            query["language"] = language
 
         # Add logging for query
         logger.info(f"Executing query: {query}")
@@ -39,15 +61,22 @@ async def get_latest_news(
         # Log the number of articles found
         logger.info(f"Found {len(articles)} articles")
         
+        refresh = None
         if not articles:
             logger.warning("No articles found in database")
-            # Trigger a news collection if no articles are found
-            await news_collector.collect_news()
-            # Try fetching again
-            articles = await db.news.find(query).sort("published_at", -1).limit(limit).to_list(length=limit)
-            logger.info(f"After collection: found {len(articles)} articles")
-        
-        return articles
+            # Ask for a background collection rather than waiting on one;
+            # concurrent callers share a single run and respect the cooldown.
+            refresh = news_collector.request_refresh()
+            logger.info(f"News refresh {refresh['status']}, retry after {refresh['retry_after']}s")
+
+        if include_entities:
+            await entity_dictionary.expand_documents(articles)
+        response = article_list_response(articles, compact, include_entities)
+        if refresh is not None:
+            response.headers["X-Refresh-Status"] = refresh["status"]
+            if refresh["retry_after"]:
+                response.headers["Retry-After"] = str(refresh["retry_after"])
+        return response
     except Exception as e:
         logger.error(f"Error fetching latest news: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -57,25 +86,25 @@ async def search_news(
     query: str,
     limit: int = Query(50, ge=1, le=100),
     from_date: Optional[datetime] = None,
-    to_date: Optional[datetime] = None
+    to_date: Optional[datetime] = None,
+    language: Optional[str] = Query(None, description="ISO 639-1 language code, e.g. en or hi"),
+    include_entities: bool = Query(False, description="Expand entity references into entity objects"),
+    compact: bool = Query(False, description="Omit entity character offsets")
 ):
     """Search news articles by keyword"""
     try:
         logger.info(f"Searching news with query: {query}")
-        db = await get_database()
         search_query = {
             "$text": {"$search": query}
         }
-        if from_date or to_date:
-            search_query["published_at"] = {}
-            if from_date:
-                search_query["published_at"]["$gte"] = from_date
-            if to_date:
-                search_query["published_at"]["$lte"] = to_date
-
-        articles = await db.news.find(search_query).sort("published_at", -1).limit(limit).to_list(length=limit)
+        if language:
+            search_query["language"] = language
+        # Archived months are only searched when from_date reaches past the hot window
+        articles = await find_articles(search_query, limit, from_date=from_date, to_date=to_date)
         logger.info(f"Found {len(articles)} articles matching search query")
-        return articles
+        if include_entities:
+            await entity_dictionary.expand_documents(articles)
+        return article_list_response(articles, compact, include_entities)
     except Exception as e:
         logger.error(f"Error searching news: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -107,16 +136,111 @@ async def get_news_categories():
 @router.get("/category/{category}", response_model=List[NewsArticle])
 async def get_news_by_category(
     category: str,
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    include_entities: bool = Query(False, description="Expand entity references into entity objects"),
+    compact: bool = Query(False, description="Omit entity character offsets")
 ):
     """Get news articles by category"""
     try:
         logger.info(f"Fetching news for category: {category}")
+        records = hot_store.latest(limit, category=category)
+        if records is not None:
+            logger.info(f"Serving {len(records)} articles in category '{category}' from hot store")
+            return ArticleListResponse(content=hot_store.render(records, compact, include_entities))
+
         articles = await news_collector.get_news_by_category(category)
         if articles and len(articles) > limit:
             articles = articles[:limit]
         logger.info(f"Found {len(articles)} articles in category '{category}'")
-        return articles
+        if include_entities:
+            await entity_dictionary.expand_documents(articles)
+        return article_list_response(articles, compact, include_entities)
     except Exception as e:
         logger.error(f"Error fetching news by category: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/feed", response_model=List[NewsArticle])
+async def get_personalized_feed(
+    limit: int = Query(50, ge=1, le=100),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """Get latest news ranked for the current user's country and reading history"""
+    try:
+        body = await personalized_feed.feed(current_user.id, current_user.country, limit)
+        if body is not None:
+            return ArticleListResponse(content=body)
+
+        # Candidates are not materialized yet (e.g. right after startup)
+        logger.info("Personalized feed not ready, falling back to latest news")
+        db = await get_database()
+        articles = await db.news.find().sort("published_at", -1).limit(limit).to_list(length=limit)
+        return article_list_response(articles)
+    except Exception as e:
+        logger.error(f"Error fetching personalized feed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/export")
+async def export_news(
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    source: Optional[str] = None,
+    language: Optional[str] = None,
+    after_tier: Optional[str] = Query(None, description="Tier of the last exported article"),
+    after_id: Optional[str] = Query(None, description="Resume after the last exported article id"),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """Stream matching articles as NDJSON, archived months first, oldest id first within each"""
+    if after_id is not None and not ObjectId.is_valid(after_id):
+        raise HTTPException(status_code=400, detail="Invalid after_id")
+    query = build_export_query(from_date, to_date, category, source, language)
+    tiers = await export_tiers(from_date, to_date)
+    after = (after_tier, after_id) if after_id else None
+    logger.info(f"Exporting news for {current_user.username}: {query} from {len(tiers)} collections")
+    return StreamingResponse(iter_ndjson(query, tiers, after), media_type="application/x-ndjson")
+
+@router.post("/{article_id}/click")
+async def record_article_click(
+    article_id: str,
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """Record that the current user opened an article"""
+    if not await personalized_feed.record_click(current_user.id, article_id):
+        raise HTTPException(status_code=404, detail="Article not found")
+    return {"detail": "Click recorded"}
+
+@router.get("/{article_id}/related", response_model=List[NewsArticle])
+async def get_related_news(
+    article_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    days: int = Query(7, ge=1, le=30),
+    include_entities: bool = Query(False, description="Expand entity references into entity objects"),
+    compact: bool = Query(False, description="Omit entity character offsets")
+):
+    """Get articles similar to the given one, published within the last `days` days"""
+    try:
+        object_id = ObjectId(article_id)
+    except InvalidId:
+        raise HTTPException(status_code=404, detail="Article not found")
+    try:
+        db = await get_database()
+        article = await db.news.find_one({"_id": object_id})
+        if article is None:
+            raise HTTPException(status_code=404, detail="Article not found")
+        if not vector_index.ready:
+            raise HTTPException(status_code=503, detail="Related articles index is still being built")
+
+        neighbours = vector_index.related(article, limit, days)
+        ids = [ObjectId(neighbour_id) for neighbour_id, _ in neighbours]
+        found = {doc["_id"]: doc for doc in await db.news.find({"_id": {"$in": ids}}).to_list(length=len(ids))}
+        # Keep similarity order; archived articles drop out of the result
+        articles = [found[i] for i in ids if i in found]
+        logger.info(f"Found {len(articles)} articles related to {article_id}")
+        if include_entities:
+            await entity_dictionary.expand_documents(articles)
+        return article_list_response(articles, compact, include_entities)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching related news: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
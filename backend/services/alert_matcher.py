@@ -0,0 +1,184 @@
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional, Set
+from pymongo.errors import BulkWriteError
+from database.mongodb import get_database
+from services.entity_dictionary import entity_dictionary, normalize_entity
+from services.vector_index import tokenize
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "500"))
+MAX_SAVED_QUERIES_PER_USER = int(os.getenv("MAX_SAVED_QUERIES_PER_USER", "50"))
+
+
+def entity_term(text: str) -> str:
+    """Canonical entity name, ignoring the label, as used in query terms"""
+    key, _ = normalize_entity(text, "")
+    return key.split("|", 1)[1]
+
+
+def keyword_terms(keywords: Iterable[str]) -> Set[str]:
+    return {token for keyword in keywords for token in tokenize(keyword)}
+
+
+class CompiledQuery:
+    """A saved query reduced to term sets, plus the terms it is indexed under"""
+    __slots__ = ("id", "user_id", "name", "keywords", "entities", "categories", "sources", "anchors")
+
+    def __init__(self, doc: Dict[str, Any]):
+        self.id = str(doc["_id"])
+        self.user_id = doc["user_id"]
+        self.name = doc["name"]
+        self.keywords = frozenset(keyword_terms(doc.get("keywords", [])))
+        self.entities = frozenset(entity_term(e) for e in doc.get("entities", []))
+        self.categories = frozenset(c.lower() for c in doc.get("categories", []))
+        self.sources = frozenset(doc.get("sources", []))
+        self.anchors = self._anchors()
+
+    def _anchors(self) -> List[str]:
+        """
+        Terms that any matching article must contain. A single required
+        term is enough when there is one; otherwise the query is posted
+        under each alternative of its most selective OR group.
+        """
+        if self.entities:
+            return [f"ent:{min(self.entities)}"]
+        if self.keywords:
+            # Longer words tend to be rarer, keeping the posting lists short
+            return [f"kw:{max(self.keywords, key=lambda k: (len(k), k))}"]
+        if self.sources:
+            return [f"src:{source}" for source in self.sources]
+        return [f"cat:{category}" for category in self.categories]
+
+    def matches(self, tokens: Set[str], entities: Set[str], category: Optional[str], source: Optional[str]) -> bool:
+        return (
+            self.keywords <= tokens
+            and self.entities <= entities
+            and (not self.categories or category in self.categories)
+            and (not self.sources or source in self.sources)
+        )
+
+
+class AlertMatcher:
+    """
+    Percolator for saved searches.
+
+    Instead of running every saved query against each new article, queries
+    are kept in an inverted index keyed by one term each must contain. An
+    article looks up only the posting lists for its own terms and verifies
+    those candidates, so matching cost follows the article's terms rather
+    than the number of saved queries.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._queries: Dict[str, CompiledQuery] = {}
+        self._index: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self):
+        return len(self._queries)
+
+    def add(self, doc: Dict[str, Any]):
+        query = CompiledQuery(doc)
+        self.remove(query.id)
+        self._queries[query.id] = query
+        for term in query.anchors:
+            self._index[term].add(query.id)
+
+    def remove(self, query_id: str):
+        query = self._queries.pop(query_id, None)
+        if query is None:
+            return
+        for term in query.anchors:
+            postings = self._index.get(term)
+            if postings is not None:
+                postings.discard(query_id)
+                if not postings:
+                    del self._index[term]
+
+    async def load(self):
+        db = await get_database()
+        self._queries = {}
+        self._index = defaultdict(set)
+        async for doc in db.saved_queries.find():
+            self.add(doc)
+        self.loaded = True
+        logger.info(f"Loaded {len(self)} saved queries into the alert index")
+
+    def match(self, article: Dict[str, Any]) -> List[CompiledQuery]:
+        """Saved queries matching a processed article"""
+        tokens = set(tokenize(f"{article.get('title') or ''} {article.get('description') or ''}"))
+        entities = set()
+        for ref in article.get("entity_refs") or []:
+            entry = entity_dictionary.lookup(ref[0])
+            if entry is not None:
+                entities.add(entity_term(entry[0]))
+        category = (article.get("category") or "").lower() or None
+        source = article.get("source")
+
+        terms = [f"kw:{t}" for t in tokens] + [f"ent:{e}" for e in entities]
+        if category:
+            terms.append(f"cat:{category}")
+        if source:
+            terms.append(f"src:{source}")
+
+        candidates = set()
+        for term in terms:
+            postings = self._index.get(term)
+            if postings:
+                candidates.update(postings)
+        matched = []
+        for query_id in candidates:
+            query = self._queries[query_id]
+            if query.matches(tokens, entities, category, source):
+                matched.append(query)
+        return matched
+
+    async def notify(self, articles: List[Dict[str, Any]]) -> int:
+        """Match processed articles and write their notifications in batches"""
+        if not self.loaded:
+            await self.load()
+        if not self._queries:
+            return 0
+
+        db = await get_database()
+        now = datetime.now()
+        pending = []
+        written = 0
+        for article in articles:
+            for query in self.match(article):
+                pending.append({
+                    "user_id": query.user_id,
+                    "query_id": query.id,
+                    "query_name": query.name,
+                    "article_id": str(article["_id"]),
+                    "title": article.get("title"),
+                    "url": article.get("url"),
+                    "published_at": article.get("published_at"),
+                    "read": False,
+                    "created_at": now
+                })
+                if len(pending) >= NOTIFICATION_BATCH_SIZE:
+                    written += await self._insert(db, pending)
+                    pending = []
+        if pending:
+            written += await self._insert(db, pending)
+        if written:
+            logger.info(f"Created {written} notifications for {len(articles)} articles")
+        return written
+
+    @staticmethod
+    async def _insert(db, notifications: List[Dict[str, Any]]) -> int:
+        try:
+            result = await db.notifications.insert_many(notifications, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Duplicates (an article matched again) are rejected by the unique index
+            return e.details.get("nInserted", 0)
+
+
+alert_matcher = AlertMatcher()
@@ -0,0 +1,324 @@
+"""
+Bulk import of historical articles from local archives.
+
+Accepts RSS/Atom XML files, NewsAPI JSON responses and NDJSON files (for
+example the output of services.exporter), or directories containing them:
+
+    python -m services.bulk_importer archives/ --workers 8
+    python -m services.bulk_importer dump.ndjson --process --checkpoint import.json
+
+Parsing runs in a process pool, writes are unordered bulk upserts keyed on
+``url``, and every finished file (or NDJSON chunk) is recorded in the
+checkpoint file so an interrupted import resumes where it stopped.
+"""
+import os
+import json
+import time
+import multiprocessing
+import asyncio
+import argparse
+import feedparser
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple
+from urllib.parse import urlparse
+from pymongo import UpdateOne
+from database.mongodb import get_database, create_indexes, close_mongodb_connection
+from models.news import NewsArticle
+from services.news_collector import feed_entries
+from services.language_detector import detect_languages
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RSS_EXTENSIONS = (".xml", ".rss", ".atom")
+JSON_EXTENSIONS = (".json",)
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+# NDJSON files are split into chunks of about this size for the workers
+NDJSON_CHUNK_BYTES = 8 * 1024 * 1024
+BULK_BATCH_SIZE = 1000
+DEFAULT_CHECKPOINT = "bulk_import_checkpoint.json"
+
+# (path, start offset, end offset); offsets are only used for NDJSON chunks
+Task = Tuple[str, int, int]
+
+
+def _parse_datetime(value) -> datetime:
+    """Naive UTC datetime, matching what the collector stores"""
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, dict) and "$date" in value:
+        return _parse_datetime(value["$date"])
+    elif value:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    else:
+        return datetime.now()
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _from_newsapi(article: Dict[str, Any]) -> Dict[str, Any]:
+    source = article.get("source")
+    return {
+        "title": article.get("title"),
+        "description": article.get("description"),
+        "url": article.get("url"),
+        "published_at": article.get("publishedAt"),
+        "source": source.get("name") if isinstance(source, dict) else source,
+        "content": article.get("content"),
+        "author": article.get("author"),
+        "image_url": article.get("urlToImage"),
+    }
+
+
+def _read_rss(path: str) -> List[Dict[str, Any]]:
+    feed = feedparser.parse(path)
+    source = urlparse(feed.feed.get("link", "")).netloc or os.path.splitext(os.path.basename(path))[0]
+    return feed_entries(feed, source)
+
+
+def _read_json(path: str) -> List[Dict[str, Any]]:
+    with open(path, "rb") as f:
+        data = json.load(f)
+    # Either a saved NewsAPI response or a bare list of its articles
+    articles = data.get("articles", []) if isinstance(data, dict) else data
+    return [_from_newsapi(article) for article in articles]
+
+
+def _read_ndjson(path: str, start: int, end: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Records from lines starting within [start, end), and the number of
+    malformed lines; a line belongs to the chunk it starts in.
+    """
+    articles = []
+    malformed = 0
+    with open(path, "rb") as f:
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                f.readline()  # Skip the tail of a line owned by the previous chunk
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # e.g. a truncated last line in an old dump
+                    malformed += 1
+                    continue
+                if not isinstance(record, dict):
+                    malformed += 1
+                    continue
+                # NewsAPI-shaped records are accepted here too
+                articles.append(_from_newsapi(record) if "publishedAt" in record else record)
+    return articles, malformed
+
+
+def _normalize(articles: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """NewsArticle documents ready to store, and the number of invalid entries"""
+    valid = [a for a in articles if a.get("title") and a.get("url")]
+    languages = detect_languages([f"{a['title']} {a.get('description') or ''}" for a in valid])
+    docs = []
+    invalid = len(articles) - len(valid)
+    for article, language in zip(valid, languages):
+        try:
+            docs.append(NewsArticle(
+                title=article["title"],
+                description=article.get("description") or "",
+                url=article["url"],
+                published_at=_parse_datetime(article.get("published_at")),
+                source=article.get("source") or "unknown",
+                content=article.get("content") or "",
+                author=article.get("author") or "",
+                image_url=article.get("image_url") or "",
+                language=article.get("language") or language
+            ).dict())
+        except Exception:
+            invalid += 1
+    return docs, invalid
+
+
+def parse_task(task: Task) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Parse one file or NDJSON chunk into article documents.
+
+    Runs in the worker pool, so it only returns plain, picklable data.
+    """
+    path, start, end = task
+    extension = os.path.splitext(path)[1].lower()
+    malformed = 0
+    if extension in NDJSON_EXTENSIONS:
+        articles, malformed = _read_ndjson(path, start, end)
+    elif extension in JSON_EXTENSIONS:
+        articles = _read_json(path)
+    else:
+        articles = _read_rss(path)
+    docs, invalid = _normalize(articles)
+    return docs, invalid + malformed
+
+
+def task_key(task: Task) -> str:
+    path, start, _ = task
+    return f"{os.path.abspath(path)}:{start}"
+
+
+def plan_tasks(paths: List[str]) -> List[Task]:
+    """Expand directories and split NDJSON files into chunks"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        else:
+            files.append(path)
+
+    tasks = []
+    for path in files:
+        extension = os.path.splitext(path)[1].lower()
+        if extension in NDJSON_EXTENSIONS:
+            size = os.path.getsize(path)
+            for start in range(0, max(size, 1), NDJSON_CHUNK_BYTES):
+                tasks.append((path, start, min(start + NDJSON_CHUNK_BYTES, size)))
+        elif extension in RSS_EXTENSIONS + JSON_EXTENSIONS:
+            tasks.append((path, 0, 0))
+    return tasks
+
+
+class BulkImporter:
+    """
+    Loads parsed archives into the news collection.
+
+    Parsing is fanned out over a process pool with a bounded number of
+    tasks in flight, so memory stays proportional to the worker count
+    rather than to the archive size.
+    """
+
+    def __init__(self, workers: int, checkpoint_path: str, process: bool = False):
+        self.workers = workers
+        self.checkpoint_path = checkpoint_path
+        self.processor = None
+        if process:
+            # spaCy is only loaded when the NLP stage is requested
+            from services.news_processor import NewsProcessor
+            self.processor = NewsProcessor()
+        self.completed = set()
+        self.parsed = 0
+        self.inserted = 0
+        self.invalid = 0
+
+    def load_checkpoint(self):
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                self.completed = set(json.load(f)["completed"])
+            logger.info(f"Resuming import: {len(self.completed)} files/chunks already done")
+
+    def save_checkpoint(self):
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"completed": sorted(self.completed), "updated_at": datetime.now().isoformat()}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    async def write(self, db, docs: List[Dict[str, Any]]):
+        for i in range(0, len(docs), BULK_BATCH_SIZE):
+            batch = docs[i:i + BULK_BATCH_SIZE]
+            result = await db.news.bulk_write(
+                [UpdateOne({"url": doc["url"]}, {"$setOnInsert": doc}, upsert=True) for doc in batch],
+                ordered=False
+            )
+            self.inserted += result.upserted_count
+            if self.processor is not None and result.upserted_ids:
+                await self.process(db, batch, result.upserted_ids)
+
+    async def process(self, db, batch: List[Dict[str, Any]], upserted_ids: Dict[int, Any]):
+        """Run the NLP stage on the articles that were actually inserted"""
+        updates = []
+        for index, article_id in upserted_ids.items():
+            article = dict(batch[index], _id=article_id)
+            try:
+                processed = await self.processor.process_article(article)
+            except Exception as e:
+                logger.error(f"Error processing article {article.get('title', 'Unknown')}: {e}")
+                continue
+            updates.append(UpdateOne({"_id": article_id}, {"$set": {
+                "language": processed["language"],
+                "entity_refs": processed["entity_refs"],
+                "category": processed["category"],
+                "sentiment": processed["sentiment"],
+                "analysis_versions": processed["analysis_versions"],
+                "processed_at": processed["processed_at"]
+            }}))
+        if updates:
+            await db.news.bulk_write(updates, ordered=False)
+
+    async def run(self, tasks: List[Task]):
+        db = await get_database()
+        pending = [task for task in tasks if task_key(task) not in self.completed]
+        logger.info(f"Importing {len(pending)} files/chunks ({len(tasks) - len(pending)} skipped)")
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+
+        # forkserver: forking after motor has started its threads can deadlock the child
+        context = multiprocessing.get_context("forkserver")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            queue = iter(pending)
+            in_flight = {}
+
+            def submit():
+                task = next(queue, None)
+                if task is not None:
+                    in_flight[loop.run_in_executor(pool, parse_task, task)] = task
+
+            for _ in range(self.workers * 2):
+                submit()
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    task = in_flight.pop(future)
+                    submit()
+                    try:
+                        docs, invalid = future.result()
+                        await self.write(db, docs)
+                    except Exception as e:
+                        # Left out of the checkpoint, so a rerun retries it
+                        logger.error(f"Failed to import {task[0]} at offset {task[1]}: {e}")
+                        continue
+                    self.parsed += len(docs)
+                    self.invalid += invalid
+                    self.completed.add(task_key(task))
+                    self.save_checkpoint()
+
+                    elapsed = time.monotonic() - started
+                    logger.info(
+                        f"{len(self.completed)}/{len(tasks)} done: {self.parsed} parsed, "
+                        f"{self.inserted} new, {self.invalid} invalid "
+                        f"({self.parsed / max(elapsed, 1e-6):.0f} articles/s)"
+                    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bulk import historical news archives")
+    parser.add_argument("paths", nargs="+", help="Files or directories of .xml/.rss/.atom, .json or .ndjson/.jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="File recording completed files/chunks")
+    parser.add_argument("--process", action="store_true", help="Run the NLP stage on newly inserted articles")
+    args = parser.parse_args()
+
+    importer = BulkImporter(args.workers, args.checkpoint, args.process)
+    importer.load_checkpoint()
+    try:
+        # Upserts key on the unique url index; on a fresh database nothing else builds it
+        await create_indexes()
+        await importer.run(plan_tasks(args.paths))
+        logger.info(
+            f"Import complete: {importer.parsed} parsed, {importer.inserted} new, "
+            f"{importer.invalid} invalid"
+        )
+    finally:
+        await close_mongodb_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,159 @@
+import re
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from database.mongodb import get_database
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_POSSESSIVE_RE = re.compile(r"['’]s$")
+
+# Normalized surface forms mapped to the normalized canonical form
+ENTITY_ALIASES = {
+    "us": "united states",
+    "u.s.": "united states",
+    "u.s": "united states",
+    "usa": "united states",
+    "u.s.a.": "united states",
+    "united states of america": "united states",
+    "uk": "united kingdom",
+    "u.k.": "united kingdom",
+    "britain": "united kingdom",
+    "great britain": "united kingdom",
+    "uae": "united arab emirates",
+    "u.a.e.": "united arab emirates",
+    "eu": "european union",
+    "un": "united nations",
+    "u.n.": "united nations",
+    "bharat": "india",
+    "pm modi": "narendra modi",
+    "modi": "narendra modi",
+}
+
+# Display text for canonical forms that should not use the first-seen spelling
+CANONICAL_TEXT = {
+    "united states": "United States",
+    "united kingdom": "United Kingdom",
+    "united arab emirates": "United Arab Emirates",
+    "european union": "European Union",
+    "united nations": "United Nations",
+    "india": "India",
+    "narendra modi": "Narendra Modi",
+}
+
+
+def normalize_entity(text: str, label: str) -> Tuple[str, str]:
+    """
+    Return ``(key, display_text)`` for an extracted entity.
+
+    The key folds case, whitespace, a leading "the", possessives and known
+    aliases, so "the U.S.", "US" and "United States's" share one entry.
+    """
+    norm = _WHITESPACE_RE.sub(" ", text).strip()
+    norm = _POSSESSIVE_RE.sub("", norm)
+    folded = norm.casefold()
+    if folded.startswith("the "):
+        folded = folded[4:]
+        norm = norm[4:]
+    canonical = ENTITY_ALIASES.get(folded, folded)
+    display = CANONICAL_TEXT.get(canonical) or (norm if canonical == folded else canonical.title())
+    return f"{label}|{canonical}", display
+
+
+class EntityDictionary:
+    """
+    Shared dictionary of canonical entities stored in the ``entities`` collection.
+
+    Articles store compact ``[entity_id, start, end]`` triples in
+    ``entity_refs``; this class interns extracted entities into IDs and
+    expands IDs back to text and label, caching both directions in memory.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._entries: Dict[int, Tuple[str, str]] = {}
+
+    def lookup(self, entity_id: int) -> Optional[Tuple[str, str]]:
+        """Cached ``(text, label)`` for an ID, or None if not loaded yet"""
+        return self._entries.get(entity_id)
+
+    def _cache(self, entity_id: int, key: str, text: str, label: str):
+        self._ids[key] = entity_id
+        self._entries[entity_id] = (text, label)
+
+    async def intern(self, entities: List[Dict[str, Any]]) -> List[List[int]]:
+        """Convert extracted entity dicts into ``[entity_id, start, end]`` refs"""
+        keyed = []
+        missing = {}
+        for entity in entities:
+            key, display = normalize_entity(entity["text"], entity["label"])
+            keyed.append((key, entity))
+            if key not in self._ids:
+                missing[key] = (display, entity["label"])
+
+        if missing:
+            await self._resolve(missing)
+
+        return [[self._ids[key], entity["start"], entity["end"]] for key, entity in keyed]
+
+    async def _resolve(self, missing: Dict[str, Tuple[str, str]]):
+        db = await get_database()
+        async for doc in db.entities.find({"key": {"$in": list(missing)}}):
+            self._cache(doc["_id"], doc["key"], doc["text"], doc["label"])
+
+        new_keys = [key for key in missing if key not in self._ids]
+        if not new_keys:
+            return
+
+        # Reserve a block of IDs in one round trip
+        counter = await db.counters.find_one_and_update(
+            {"_id": "entities"},
+            {"$inc": {"seq": len(new_keys)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        first_id = counter["seq"] - len(new_keys) + 1
+        for offset, key in enumerate(new_keys):
+            text, label = missing[key]
+            entity_id = first_id + offset
+            try:
+                await db.entities.insert_one({"_id": entity_id, "key": key, "text": text, "label": label})
+            except DuplicateKeyError:
+                # Another worker interned the same entity first; use its ID
+                doc = await db.entities.find_one({"key": key})
+                entity_id, text, label = doc["_id"], doc["text"], doc["label"]
+            self._cache(entity_id, key, text, label)
+
+    async def prefetch(self, entity_ids: Iterable[int]):
+        """Load any IDs that are not cached yet"""
+        missing = {entity_id for entity_id in entity_ids if entity_id not in self._entries}
+        if not missing:
+            return
+        db = await get_database()
+        async for doc in db.entities.find({"_id": {"$in": list(missing)}}):
+            self._cache(doc["_id"], doc["key"], doc["text"], doc["label"])
+
+    def expand(self, entity_refs: List[List[int]]) -> List[Dict[str, Any]]:
+        """Expand refs into entity dicts; IDs must already be cached (see prefetch)"""
+        entities = []
+        for entity_id, start, end in entity_refs:
+            entry = self._entries.get(entity_id)
+            if entry is None:
+                continue
+            entities.append({"text": entry[0], "label": entry[1], "start": start, "end": end})
+        return entities
+
+    async def expand_documents(self, docs: List[Dict[str, Any]]):
+        """Fill ``entities`` from ``entity_refs`` in place for a batch of articles"""
+        await self.prefetch(
+            ref[0] for doc in docs for ref in (doc.get("entity_refs") or [])
+        )
+        for doc in docs:
+            if doc.get("entity_refs"):
+                doc["entities"] = self.expand(doc["entity_refs"])
+
+
+entity_dictionary = EntityDictionary()
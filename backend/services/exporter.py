@@ -0,0 +1,316 @@
+"""
+Bulk export of articles as NDJSON or Parquet.
+
+The API streams NDJSON through ``/api/news/export``; the CLI can also write
+Parquet part files. Exports cover the monthly archive collections the date
+range reaches into, oldest month first, followed by the primary collection:
+
+    python -m services.exporter --format ndjson --out articles.ndjson --from-date 2025-01-01
+    python -m services.exporter --format parquet --out export_dir --category world --resume
+"""
+import os
+import json
+import asyncio
+import argparse
+from datetime import datetime
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from bson import ObjectId
+from database.mongodb import get_database, close_mongodb_connection
+from services.entity_dictionary import entity_dictionary
+from services.news_archiver import (
+    ARCHIVE_PREFIX, NEWS_ARCHIVE_MODE, hot_cutoff, naive_utc, _month_start, _next_month
+)
+from services.serialization import ARTICLE_FIELDS, dumps
+import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 1000
+PARQUET_PART_ROWS = 100000
+CHECKPOINT_FILE = "_checkpoint.json"
+HOT_TIER = "news"
+
+# (tier, _id) of the last exported article; a None tier means the primary collection
+Resume = Tuple[Optional[str], str]
+
+
+def build_export_query(
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    category: Optional[str] = None,
+    source: Optional[str] = None,
+    language: Optional[str] = None
+) -> Dict[str, Any]:
+    from_date, to_date = naive_utc(from_date), naive_utc(to_date)
+    query = {}
+    if from_date or to_date:
+        query["published_at"] = {}
+        if from_date:
+            query["published_at"]["$gte"] = from_date
+        if to_date:
+            query["published_at"]["$lte"] = to_date
+    if category:
+        query["category"] = category
+    if source:
+        query["source"] = source
+    if language:
+        query["language"] = language
+    return query
+
+
+def _tier_rank(tier: str) -> Tuple[int, str]:
+    # Archive names sort chronologically; the primary collection comes last
+    return (1, "") if tier == HOT_TIER else (0, tier)
+
+
+async def export_tiers(from_date: Optional[datetime] = None, to_date: Optional[datetime] = None) -> List[str]:
+    """Collections an export over the date range reads, in export order"""
+    from_date, to_date = naive_utc(from_date), naive_utc(to_date)
+    tiers = [HOT_TIER]
+    if from_date is not None and from_date >= hot_cutoff():
+        return tiers
+    if NEWS_ARCHIVE_MODE != "mongo":
+        logger.warning("Archived months are stored as files and are not included in the export")
+        return tiers
+
+    db = await get_database()
+    names = await db.list_collection_names(filter={"name": {"$regex": f"^{ARCHIVE_PREFIX}"}})
+    archives = []
+    for name in names:
+        year, month = map(int, name[len(ARCHIVE_PREFIX):].split("_"))
+        month_start = datetime(year, month, 1)
+        if from_date is not None and _next_month(month_start) <= from_date:
+            continue
+        if to_date is not None and month_start > _month_start(to_date):
+            continue
+        archives.append(name)
+    return sorted(archives, key=_tier_rank) + tiers
+
+
+def export_record(doc: Dict[str, Any], tier: str) -> Dict[str, Any]:
+    """Public article fields plus the tier and id, which clients use to resume"""
+    record = {"id": str(doc["_id"]), "tier": tier}
+    record.update({field: doc.get(field) for field in ARTICLE_FIELDS})
+    return record
+
+
+async def iter_batches(
+    query: Dict[str, Any],
+    tiers: List[str],
+    after: Optional[Resume] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yield export records tier by tier, in ``_id`` order within each tier.
+
+    Only one batch is held in memory. Ids only order articles within a tier
+    (and archives written before ids were kept hold new ones), so a
+    position is a (tier, _id) pair: tiers before ``after[0]`` are skipped
+    and that tier resumes after ``after[1]``.
+    """
+    if after is not None:
+        after = (after[0] or HOT_TIER, after[1])
+    db = await get_database()
+    for tier in tiers:
+        tier_query = dict(query)
+        if after is not None:
+            if _tier_rank(tier) < _tier_rank(after[0]):
+                continue
+            if tier == after[0]:
+                tier_query["_id"] = {"$gt": ObjectId(after[1])}
+
+        cursor = db[tier].find(tier_query).sort("_id", 1).batch_size(batch_size)
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                await entity_dictionary.expand_documents(batch)
+                yield [export_record(doc, tier) for doc in batch]
+                batch = []
+        if batch:
+            await entity_dictionary.expand_documents(batch)
+            yield [export_record(doc, tier) for doc in batch]
+
+
+async def iter_ndjson(query: Dict[str, Any], tiers: List[str], after: Optional[Resume] = None) -> AsyncIterator[bytes]:
+    """NDJSON body chunks, one chunk per batch"""
+    async for records in iter_batches(query, tiers, after):
+        yield b"".join(dumps(record) + b"\n" for record in records)
+
+
+def parquet_schema():
+    return pa.schema([
+        ("id", pa.string()),
+        ("tier", pa.string()),
+        ("title", pa.string()),
+        ("description", pa.string()),
+        ("url", pa.string()),
+        ("published_at", pa.timestamp("us")),
+        ("source", pa.string()),
+        ("content", pa.string()),
+        ("author", pa.string()),
+        ("image_url", pa.string()),
+        ("language", pa.string()),
+        ("category", pa.string()),
+        ("sentiment_positive", pa.float64()),
+        ("sentiment_negative", pa.float64()),
+        ("sentiment_neutral", pa.float64()),
+        ("entity_texts", pa.list_(pa.string())),
+        ("entity_labels", pa.list_(pa.string())),
+        ("processed_at", pa.timestamp("us")),
+    ])
+
+
+def to_arrow(records: List[Dict[str, Any]]):
+    """Flatten sentiment and entities into columns for one batch"""
+    columns = {name: [] for name in parquet_schema().names}
+    for record in records:
+        sentiment = record.get("sentiment") or {}
+        entities = record.get("entities") or []
+        for name in ("id", "tier", "title", "description", "url", "published_at", "source",
+                     "content", "author", "image_url", "language", "category", "processed_at"):
+            columns[name].append(record.get(name))
+        columns["sentiment_positive"].append(sentiment.get("positive"))
+        columns["sentiment_negative"].append(sentiment.get("negative"))
+        columns["sentiment_neutral"].append(sentiment.get("neutral"))
+        columns["entity_texts"].append([e["text"] for e in entities])
+        columns["entity_labels"].append([e["label"] for e in entities])
+    return pa.Table.from_pydict(columns, schema=parquet_schema())
+
+
+def _load_checkpoint(path: str) -> Dict[str, Any]:
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def _save_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def _last_ndjson_position(path: str) -> Optional[Resume]:
+    """(tier, id) of the last complete line in an NDJSON file, truncating any partial line"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        position = size
+        tail = b""
+        while position > 0 and tail.count(b"\n") < 2:
+            step = min(65536, position)
+            position -= step
+            f.seek(position)
+            tail = f.read(step) + tail
+        lines = tail.split(b"\n")
+        if lines[-1]:
+            # Drop a partially written last line
+            f.truncate(size - len(lines[-1]))
+        complete = [line for line in lines[:-1] if line]
+        if not complete:
+            return None
+        record = json.loads(complete[-1])
+        return record.get("tier", HOT_TIER), record["id"]
+
+
+async def export_ndjson(query_args: Dict[str, Any], out: str, resume: bool = False) -> int:
+    after = _last_ndjson_position(out) if resume else None
+    if after:
+        logger.info(f"Resuming NDJSON export after {after[1]} in {after[0]}")
+    tiers = await export_tiers(query_args["from_date"], query_args["to_date"])
+    exported = 0
+    with open(out, "ab" if resume else "wb") as f:
+        async for chunk in iter_ndjson(build_export_query(**query_args), tiers, after):
+            await asyncio.to_thread(f.write, chunk)
+            exported += chunk.count(b"\n")
+            logger.info(f"Exported {exported} articles")
+    return exported
+
+
+async def export_parquet(query_args: Dict[str, Any], out: str, resume: bool = False) -> int:
+    """Write numbered Parquet part files into ``out``, checkpointing after each part"""
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+    os.makedirs(out, exist_ok=True)
+    checkpoint_path = os.path.join(out, CHECKPOINT_FILE)
+    checkpoint = _load_checkpoint(checkpoint_path) if resume else {}
+    part = checkpoint.get("next_part", 0)
+    last_id = checkpoint.get("last_id")
+    last_tier = checkpoint.get("last_tier", HOT_TIER)
+    after = (last_tier, last_id) if last_id else None
+    if after:
+        logger.info(f"Resuming Parquet export at part {part} after {last_id} in {last_tier}")
+
+    exported = 0
+    writer = None
+    part_rows = 0
+
+    def close_part():
+        nonlocal writer, part, part_rows
+        writer.close()
+        writer = None
+        part += 1
+        part_rows = 0
+        # Parts are only recorded once they are complete on disk
+        _save_checkpoint(checkpoint_path, {"next_part": part, "last_tier": last_tier, "last_id": last_id})
+
+    tiers = await export_tiers(query_args["from_date"], query_args["to_date"])
+    async for records in iter_batches(build_export_query(**query_args), tiers, after):
+        table = to_arrow(records)
+        if writer is None:
+            path = os.path.join(out, f"part-{part:05d}.parquet")
+            writer = pq.ParquetWriter(path, parquet_schema(), compression="zstd")
+        await asyncio.to_thread(writer.write_table, table)
+        part_rows += len(records)
+        exported += len(records)
+        last_tier, last_id = records[-1]["tier"], records[-1]["id"]
+        if part_rows >= PARQUET_PART_ROWS:
+            await asyncio.to_thread(close_part)
+        logger.info(f"Exported {exported} articles")
+    if writer is not None:
+        await asyncio.to_thread(close_part)
+    return exported
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Export articles as NDJSON or Parquet")
+    parser.add_argument("--format", choices=["ndjson", "parquet"], default="ndjson")
+    parser.add_argument("--out", required=True, help="NDJSON file, or directory for Parquet parts")
+    parser.add_argument("--from-date", type=datetime.fromisoformat)
+    parser.add_argument("--to-date", type=datetime.fromisoformat)
+    parser.add_argument("--category")
+    parser.add_argument("--source")
+    parser.add_argument("--language")
+    parser.add_argument("--resume", action="store_true", help="Continue a previous export to --out")
+    args = parser.parse_args()
+
+    query_args = {
+        "from_date": args.from_date,
+        "to_date": args.to_date,
+        "category": args.category,
+        "source": args.source,
+        "language": args.language,
+    }
+    try:
+        if args.format == "ndjson":
+            exported = await export_ndjson(query_args, args.out, args.resume)
+        else:
+            exported = await export_parquet(query_args, args.out, args.resume)
+        logger.info(f"Export complete: {exported} articles written to {args.out}")
+    finally:
+        await close_mongodb_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
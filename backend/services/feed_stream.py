@@ -0,0 +1,147 @@
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Set
+import logging
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional; callers fall back to feedparser
+    etree = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+MEDIA_NS = "http://search.yahoo.com/mrss/"
+
+IMG_SRC_RE = re.compile(r'<img\s+[^>]*src=[\'"]([^\'"]+)[\'"]')
+
+
+def is_available() -> bool:
+    """Whether the incremental parser can be used (requires lxml)"""
+    return etree is not None
+
+
+def _local_name(tag) -> str:
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse RFC 822 (RSS) or ISO 8601 (Atom) dates into naive UTC datetimes"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class FeedStreamParser:
+    """
+    Incremental RSS/Atom parser built on lxml's pull parser.
+
+    Bytes are fed as they arrive from the network and completed ``<item>`` /
+    ``<entry>`` elements are turned into article dicts immediately, then
+    released so the whole document is never held in memory. Parsing stops
+    early once an entry whose URL is in ``seen_urls`` is reached, since feeds
+    list their newest entries first.
+    """
+
+    def __init__(self, feed_url: str, seen_urls: Optional[Set[str]] = None):
+        if etree is None:
+            raise RuntimeError("lxml is required for incremental feed parsing")
+        self.source = feed_url.split('/')[2]
+        self.seen_urls = seen_urls or set()
+        self.done = False
+        self._parser = etree.XMLPullParser(events=("end",), recover=True, resolve_entities=False)
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """Feed a chunk of the response body and return any completed articles"""
+        if self.done:
+            return []
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Signal end of input and return any remaining articles"""
+        if self.done:
+            return []
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError as e:
+            logger.warning(f"Malformed feed from {self.source}: {e}")
+        articles = self._drain()
+        self.done = True
+        return articles
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        articles = []
+        for _, elem in self._parser.read_events():
+            if _local_name(elem.tag) not in ("item", "entry"):
+                continue
+            article = self._build_article(elem)
+            # Free the finished element and any already-processed siblings
+            elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+            if article is None:
+                continue
+            if article['url'] in self.seen_urls:
+                self.done = True
+                break
+            articles.append(article)
+        return articles
+
+    def _build_article(self, elem) -> Optional[Dict[str, Any]]:
+        title = link = description = published = None
+        image_url = None
+        for child in elem:
+            name = _local_name(child.tag)
+            if name == "title":
+                title = (child.text or "").strip()
+            elif name == "link":
+                # RSS puts the URL in the text, Atom in the href attribute
+                href = child.get("href")
+                if href and child.get("rel", "alternate") == "alternate":
+                    link = href
+                elif child.text and not link:
+                    link = child.text.strip()
+            elif name in ("description", "summary") and description is None:
+                description = child.text or ""
+            elif name in ("pubDate", "published", "updated") and published is None:
+                published = _parse_date(child.text)
+            elif image_url is None:
+                if child.tag in ("{%s}content" % MEDIA_NS, "{%s}thumbnail" % MEDIA_NS):
+                    image_url = child.get("url")
+                elif name == "enclosure":
+                    image_url = child.get("url")
+
+        if not title or not link:
+            return None
+        description = description or ""
+        if image_url is None:
+            # Fallback: try to extract from the description using regex.
+            match = IMG_SRC_RE.search(description)
+            if match:
+                image_url = match.group(1)
+
+        return {
+            'title': title,
+            'description': description,
+            'url': link,
+            'published_at': published or datetime.now(),
+            'source': self.source,
+            'image_url': image_url
+        }
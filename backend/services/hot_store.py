@@ -0,0 +1,335 @@
+import os
+import asyncio
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from bson import ObjectId
+from database.mongodb import get_database
+from services.entity_dictionary import entity_dictionary
+from services.serialization import serialize_article_head, serialize_entities, with_entities, render_fragments
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HOT_STORE_SIZE = int(os.getenv("HOT_STORE_SIZE", "50000"))
+HOT_STORE_REFRESH_INTERVAL = int(os.getenv("HOT_STORE_REFRESH_INTERVAL", "15"))
+# Refreshes re-read this many seconds behind the watermarks, so a write that
+# commits after a later one (ids and processed_at are set before the write)
+# is still picked up
+HOT_STORE_REFRESH_OVERLAP = int(os.getenv("HOT_STORE_REFRESH_OVERLAP", "120"))
+LOAD_BATCH_SIZE = 1000
+
+
+class HotArticle:
+    """Compact record for one cached article, with its response JSON pre-rendered"""
+    __slots__ = ("id", "url", "published_at", "category", "source", "language", "head",
+                 "entities_json", "compact_entities_json")
+
+    def __init__(self, id, url: str, published_at: float, category: Optional[str],
+                 source: str, language: Optional[str], head: bytes, entities_json: Optional[bytes],
+                 compact_entities_json: Optional[bytes]):
+        self.id = id
+        self.url = url
+        self.published_at = published_at
+        self.category = category
+        self.source = source
+        self.language = language
+        self.head = head
+        self.entities_json = entities_json
+        self.compact_entities_json = compact_entities_json
+
+
+def _sort_key(record: HotArticle):
+    # Newest first; the URL breaks ties so every record has a unique position
+    return (-record.published_at, record.url)
+
+
+class _SortedIndex:
+    """List of records kept in newest-first order"""
+    __slots__ = ("records",)
+
+    def __init__(self):
+        self.records: List[HotArticle] = []
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, record: HotArticle):
+        insort(self.records, record, key=_sort_key)
+
+    def remove(self, record: HotArticle):
+        i = bisect_left(self.records, _sort_key(record), key=_sort_key)
+        if i < len(self.records) and self.records[i] is record:
+            del self.records[i]
+
+    def oldest(self) -> Optional[HotArticle]:
+        return self.records[-1] if self.records else None
+
+
+def _timestamp(value) -> float:
+    return value.timestamp() if isinstance(value, datetime) else 0.0
+
+
+class HotArticleStore:
+    """
+    In-process cache of the most recent articles for the list endpoints.
+
+    Keeps up to ``capacity`` articles as slotted records sorted by
+    ``published_at``, with per-category, per-source and per-language indexes. The store is
+    loaded once and then refreshed incrementally by polling for documents
+    inserted (``_id``) or processed (``processed_at``) since the last refresh,
+    minus an overlap window; documents already applied in that window are
+    skipped by url.
+    """
+
+    def __init__(self, capacity: int = HOT_STORE_SIZE):
+        self.capacity = capacity
+        self.loaded = False
+        self._by_url: Dict[str, HotArticle] = {}
+        self._by_id: Dict[str, HotArticle] = {}
+        self._all = _SortedIndex()
+        self._by_category = defaultdict(_SortedIndex)
+        self._by_source = defaultdict(_SortedIndex)
+        self._by_language = defaultdict(_SortedIndex)
+        self._last_id = None
+        self._last_processed = None
+        # url -> (_id, processed_at) of documents applied within the overlap window
+        self._applied: Dict[str, Tuple[Any, Any]] = {}
+
+    def __len__(self):
+        return len(self._all)
+
+    @property
+    def is_full(self) -> bool:
+        return len(self._all) >= self.capacity
+
+    def upsert(self, doc: Dict[str, Any]) -> bool:
+        """Insert or replace an article; returns False if it is too old to keep"""
+        published_at = _timestamp(doc.get("published_at"))
+        existing = self._by_url.get(doc.get("url"))
+        if existing is None and self.is_full:
+            oldest = self._all.oldest()
+            if oldest is not None and published_at <= oldest.published_at:
+                return False
+
+        try:
+            head = serialize_article_head(doc)
+            entities_json = serialize_entities(doc.get("entities"))
+            compact_entities_json = serialize_entities(doc.get("entities"), compact=True)
+        except Exception as e:
+            logger.warning(f"Skipping article {doc.get('url')} in hot store: {e}")
+            return False
+
+        if existing is not None:
+            self._remove(existing)
+        record = HotArticle(
+            id=doc.get("_id"),
+            url=doc["url"],
+            published_at=published_at,
+            category=(doc.get("category") or "").lower() or None,
+            source=doc.get("source"),
+            language=doc.get("language"),
+            head=head,
+            entities_json=entities_json,
+            compact_entities_json=compact_entities_json
+        )
+        self._by_url[record.url] = record
+        if record.id is not None:
+            self._by_id[str(record.id)] = record
+        self._all.add(record)
+        if record.category:
+            self._by_category[record.category].add(record)
+        self._by_source[record.source].add(record)
+        if record.language:
+            self._by_language[record.language].add(record)
+
+        while len(self._all) > self.capacity:
+            self._remove(self._all.oldest())
+        return True
+
+    def _remove(self, record: HotArticle):
+        self._by_url.pop(record.url, None)
+        if record.id is not None:
+            self._by_id.pop(str(record.id), None)
+        self._all.remove(record)
+        if record.category:
+            index = self._by_category.get(record.category)
+            if index is not None:
+                index.remove(record)
+                if not index:
+                    del self._by_category[record.category]
+        index = self._by_source.get(record.source)
+        if index is not None:
+            index.remove(record)
+            if not index:
+                del self._by_source[record.source]
+        if record.language:
+            index = self._by_language.get(record.language)
+            if index is not None:
+                index.remove(record)
+                if not index:
+                    del self._by_language[record.language]
+
+    def get(self, article_id: str) -> Optional[HotArticle]:
+        """Cached record for an article ID, if it is in the store"""
+        return self._by_id.get(article_id)
+
+    def categories(self) -> List[str]:
+        return list(self._by_category)
+
+    def by_category(self, category: str) -> List[HotArticle]:
+        """All cached articles in a category, newest first"""
+        index = self._by_category.get(category.lower())
+        return index.records if index else []
+
+    def evict_older_than(self, cutoff: datetime):
+        """Drop cached articles published before ``cutoff`` (e.g. after archival)"""
+        threshold = cutoff.timestamp()
+        oldest = self._all.oldest()
+        while oldest is not None and oldest.published_at < threshold:
+            self._remove(oldest)
+            oldest = self._all.oldest()
+
+    def latest(self, limit: int, category: Optional[str] = None,
+               source: Optional[str] = None, language: Optional[str] = None) -> Optional[List[HotArticle]]:
+        """
+        Return up to ``limit`` newest articles matching the filters.
+
+        Returns None when the store cannot answer authoritatively: it has not
+        been loaded yet, or it is full and holds fewer matches than requested
+        (older matches may exist only in the database).
+        """
+        if not self.loaded:
+            return None
+
+        filters = []
+        if category:
+            category = category.lower()
+            filters.append((self._by_category.get(category), lambda r: r.category == category))
+        if source:
+            filters.append((self._by_source.get(source), lambda r: r.source == source))
+        if language:
+            filters.append((self._by_language.get(language), lambda r: r.language == language))
+
+        if not filters:
+            records = self._all.records[:limit]
+        elif any(index is None for index, _ in filters):
+            records = []
+        elif len(filters) == 1:
+            records = filters[0][0].records[:limit]
+        else:
+            # Walk the smallest index and check the other fields
+            filters.sort(key=lambda f: len(f[0]))
+            checks = [check for _, check in filters[1:]]
+            records = []
+            for record in filters[0][0].records:
+                if all(check(record) for check in checks):
+                    records.append(record)
+                    if len(records) >= limit:
+                        break
+
+        if len(records) < limit and self.is_full:
+            return None
+        return records
+
+    @staticmethod
+    def render(records: List[HotArticle], compact: bool = False,
+               include_entities: bool = False) -> bytes:
+        """Assemble a JSON array response body from pre-rendered fragments"""
+        if not include_entities:
+            return render_fragments(with_entities(record.head, None) for record in records)
+        if compact:
+            return render_fragments(with_entities(record.head, record.compact_entities_json) for record in records)
+        return render_fragments(with_entities(record.head, record.entities_json) for record in records)
+
+    async def _upsert_batch(self, docs: List[Dict[str, Any]]) -> int:
+        fresh = []
+        for doc in docs:
+            self._track_watermarks(doc)
+            version = (doc.get("_id"), doc.get("processed_at"))
+            if self._applied.get(doc.get("url")) != version:
+                self._applied[doc.get("url")] = version
+                fresh.append(doc)
+        # Expand entity refs up front so the fragments can be rendered eagerly
+        await entity_dictionary.expand_documents(fresh)
+        updated = 0
+        for doc in fresh:
+            if self.upsert(doc):
+                updated += 1
+        return updated
+
+    async def _apply(self, cursor) -> int:
+        updated = 0
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= LOAD_BATCH_SIZE:
+                updated += await self._upsert_batch(batch)
+                batch = []
+        if batch:
+            updated += await self._upsert_batch(batch)
+        return updated
+
+    async def load(self):
+        """Populate the store with the most recent articles"""
+        db = await get_database()
+        await self._apply(db.news.find().sort("published_at", -1).limit(self.capacity))
+        # Start incremental refreshes from the newest document overall, not
+        # just the newest one that fit in the store.
+        newest = await db.news.find_one(sort=[("_id", -1)], projection={"_id": 1})
+        if newest is not None:
+            self._track_watermarks(newest)
+        self.loaded = True
+        logger.info(f"Hot article store loaded with {len(self)} articles")
+
+    async def refresh(self):
+        """Apply articles inserted or processed since the last refresh"""
+        db = await get_database()
+        overlap = timedelta(seconds=HOT_STORE_REFRESH_OVERLAP)
+        since_id = since_processed = None
+        conditions = []
+        if self._last_id is not None:
+            since_id = ObjectId.from_datetime(self._last_id.generation_time - overlap)
+            conditions.append({"_id": {"$gte": since_id}})
+        if self._last_processed is not None:
+            since_processed = self._last_processed - overlap
+            conditions.append({"processed_at": {"$gte": since_processed}})
+        query = {"$or": conditions} if conditions else {}
+
+        updated = await self._apply(db.news.find(query))
+        self._prune_applied(since_id, since_processed)
+        if updated:
+            logger.info(f"Hot article store refreshed {updated} articles ({len(self)} cached)")
+
+    def _prune_applied(self, since_id, since_processed):
+        """Forget documents that fell behind the overlap window on both watermarks"""
+        self._applied = {
+            url: (doc_id, processed_at) for url, (doc_id, processed_at) in self._applied.items()
+            if (since_id is not None and doc_id is not None and doc_id >= since_id)
+            or (since_processed is not None and processed_at is not None and processed_at >= since_processed)
+        }
+
+    def _track_watermarks(self, doc: Dict[str, Any]):
+        doc_id = doc.get("_id")
+        if doc_id is not None and (self._last_id is None or doc_id > self._last_id):
+            self._last_id = doc_id
+        processed_at = doc.get("processed_at")
+        if processed_at is not None and (self._last_processed is None or processed_at > self._last_processed):
+            self._last_processed = processed_at
+
+    async def start_refresh_loop(self, interval: int = HOT_STORE_REFRESH_INTERVAL):
+        logger.info("Hot article store refresh loop started.")
+        while True:
+            try:
+                if not self.loaded:
+                    await self.load()
+                else:
+                    await self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing hot article store: {e}")
+            await asyncio.sleep(interval)
+
+
+hot_store = HotArticleStore()
@@ -0,0 +1,201 @@
+import os
+import gzip
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Tuple
+from pymongo import ReplaceOne, TEXT
+from database.mongodb import get_database
+from services.hot_store import hot_store
+from services.serialization import dumps
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Articles newer than this stay in the primary `news` collection
+NEWS_HOT_DAYS = int(os.getenv("NEWS_HOT_DAYS", "30"))
+# "mongo" moves old articles to monthly news_archive_YYYY_MM collections,
+# "file" writes them to gzipped NDJSON files under NEWS_ARCHIVE_DIR instead.
+NEWS_ARCHIVE_MODE = os.getenv("NEWS_ARCHIVE_MODE", "mongo")
+NEWS_ARCHIVE_DIR = os.getenv("NEWS_ARCHIVE_DIR", "archive")
+ARCHIVE_BATCH_SIZE = 1000
+ARCHIVE_PREFIX = "news_archive_"
+
+# Entities and full text are dropped on archival; _id is kept so ids held
+# by notifications, user events and clients stay valid
+ARCHIVE_FIELDS = (
+    "_id", "title", "description", "url", "published_at", "source", "author",
+    "image_url", "category", "language", "sentiment", "processed_at"
+)
+
+
+def hot_cutoff(hot_days: int = NEWS_HOT_DAYS) -> datetime:
+    return datetime.now() - timedelta(days=hot_days)
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored dates are naive UTC; convert tz-aware request parameters to match"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def archive_collection_name(year: int, month: int) -> str:
+    return f"{ARCHIVE_PREFIX}{year:04d}_{month:02d}"
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(value: datetime) -> datetime:
+    if value.month == 12:
+        return datetime(value.year + 1, 1, 1)
+    return datetime(value.year, value.month + 1, 1)
+
+
+def archive_months(from_date: datetime, to_date: datetime) -> List[Tuple[int, int]]:
+    """(year, month) pairs overlapping the range, newest first"""
+    months = []
+    month = _month_start(from_date)
+    while month <= to_date:
+        months.append((month.year, month.month))
+        month = _next_month(month)
+    return list(reversed(months))
+
+
+def compact_for_archive(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: doc[field] for field in ARCHIVE_FIELDS if field in doc}
+
+
+class NewsArchiver:
+    """Moves articles older than the hot window out of the primary collection"""
+
+    def __init__(self, hot_days: int = NEWS_HOT_DAYS, mode: str = NEWS_ARCHIVE_MODE,
+                 archive_dir: str = NEWS_ARCHIVE_DIR):
+        if mode not in ("mongo", "file"):
+            raise ValueError(f"Unknown archive mode: {mode}")
+        self.hot_days = hot_days
+        self.mode = mode
+        self.archive_dir = archive_dir
+        self._indexed_collections = set()
+
+    async def archive_old_articles(self) -> int:
+        """Archive every article older than the hot window, in batches"""
+        db = await get_database()
+        cutoff = hot_cutoff(self.hot_days)
+        archived = 0
+        while True:
+            batch = await db.news.find(
+                {"published_at": {"$lt": cutoff}}
+            ).sort("published_at", 1).limit(ARCHIVE_BATCH_SIZE).to_list(length=ARCHIVE_BATCH_SIZE)
+            if not batch:
+                break
+
+            by_month = defaultdict(list)
+            for doc in batch:
+                published_at = doc["published_at"]
+                by_month[(published_at.year, published_at.month)].append(compact_for_archive(doc))
+
+            for (year, month), docs in by_month.items():
+                if self.mode == "mongo":
+                    await self._write_collection(db, year, month, docs)
+                else:
+                    await asyncio.to_thread(self._write_file, year, month, docs)
+
+            # Only remove from the primary once the archive write succeeded
+            await db.news.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+            archived += len(batch)
+            logger.info(f"Archived {archived} articles older than {cutoff.date()}")
+
+        hot_store.evict_older_than(cutoff)
+        return archived
+
+    async def _write_collection(self, db, year: int, month: int, docs: List[Dict[str, Any]]):
+        name = archive_collection_name(year, month)
+        collection = db[name]
+        if name not in self._indexed_collections:
+            await create_archive_indexes(collection)
+            self._indexed_collections.add(name)
+        # Replace by _id so re-running after a partial failure is harmless
+        await collection.bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs],
+            ordered=False
+        )
+
+    def _write_file(self, year: int, month: int, docs: List[Dict[str, Any]]):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"news-{year:04d}-{month:02d}.ndjson.gz")
+        # Appending writes a new gzip member; readers see one continuous stream
+        with gzip.open(path, "ab") as f:
+            for doc in docs:
+                f.write(dumps(doc) + b"\n")
+
+    async def start_archive_loop(self, interval: int = 86400):
+        logger.info(f"News archive loop started (hot window: {self.hot_days} days, mode: {self.mode}).")
+        while True:
+            try:
+                await self.archive_old_articles()
+            except Exception as e:
+                logger.error(f"Error in archive loop: {e}")
+            await asyncio.sleep(interval)
+
+
+async def create_archive_indexes(collection):
+    await collection.create_index("url", unique=True)
+    await collection.create_index("published_at")
+    await collection.create_index("category")
+    await collection.create_index([("title", TEXT), ("description", TEXT)])
+
+
+async def find_articles(
+    query: Dict[str, Any],
+    limit: int,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Find the newest articles matching ``query``, fanning out to archives when needed.
+
+    ``query`` must not contain a ``published_at`` condition; pass the range
+    as ``from_date``/``to_date``. Monthly archive collections are only
+    queried when the range starts before the hot window, and only for the
+    months the range covers. File archives (NEWS_ARCHIVE_MODE=file) are not
+    searchable, so such ranges only return hot results, with a warning.
+    """
+    db = await get_database()
+    from_date, to_date = naive_utc(from_date), naive_utc(to_date)
+    query = dict(query)
+    if from_date or to_date:
+        query["published_at"] = {}
+        if from_date:
+            query["published_at"]["$gte"] = from_date
+        if to_date:
+            query["published_at"]["$lte"] = to_date
+
+    articles = await db.news.find(query).sort("published_at", -1).limit(limit).to_list(length=limit)
+
+    cutoff = hot_cutoff()
+    if from_date is None or from_date >= cutoff:
+        return articles
+    if NEWS_ARCHIVE_MODE != "mongo":
+        logger.warning("Archived months are stored as files and are not searched; results cover the hot window only")
+        return articles
+
+    existing = set(await db.list_collection_names(filter={"name": {"$regex": f"^{ARCHIVE_PREFIX}"}}))
+    for year, month in archive_months(from_date, min(to_date or cutoff, cutoff)):
+        name = archive_collection_name(year, month)
+        if name not in existing:
+            continue
+        # Months are visited newest first, so once we have enough results
+        # newer than this month nothing older can displace them.
+        if len(articles) >= limit and articles[limit - 1]["published_at"] >= _next_month(datetime(year, month, 1)):
+            break
+        archived = await db[name].find(query).sort("published_at", -1).limit(limit).to_list(length=limit)
+        # An article may briefly exist in both tiers while a batch is moved
+        seen = {article["url"] for article in articles}
+        articles.extend(article for article in archived if article["url"] not in seen)
+        articles.sort(key=lambda a: a["published_at"], reverse=True)
+        del articles[limit:]
+    return articles
@@ -1,18 +1,115 @@
 import os
+import time
+import multiprocessing
 import asyncio
 import aiohttp
 import feedparser
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set, Optional
 from newsapi import NewsApiClient
 from database.mongodb import get_database
 from models.news import NewsArticle
+from services.language_detector import detect_languages
+from services.feed_stream import FeedStreamParser, IMG_SRC_RE, is_available as stream_parser_available
+from concurrent.futures import ProcessPoolExecutor
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+RSS_PARSE_WORKERS = int(os.getenv("RSS_PARSE_WORKERS", "2"))
+RSS_STREAM_PARSE = os.getenv("RSS_STREAM_PARSE", "false").lower() in ("1", "true", "yes")
+STREAM_CHUNK_SIZE = 64 * 1024
+MAX_SEEN_URLS_PER_FEED = 2000
+# Minimum gap between on-demand collections requested by API handlers
+COLLECTION_COOLDOWN = int(os.getenv("COLLECTION_COOLDOWN", "300"))
+# Retry-After estimate until a collection has been timed
+DEFAULT_COLLECTION_SECONDS = 60
+
+_parse_pool = None
+
+# Collection state is shared by every NewsCollector in the process, so the
+# scheduler and the routers never run overlapping collections.
+_collection_task: Optional[asyncio.Task] = None
+_collection_started_at = 0.0
+_collection_finished_at = 0.0
+_collection_duration = float(DEFAULT_COLLECTION_SECONDS)
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Lazily create the worker pool used for CPU-bound feed parsing"""
+    global _parse_pool
+    if _parse_pool is None:
+        # Workers must not be forked from a process already running motor's
+        # background threads, which can deadlock the child
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=RSS_PARSE_WORKERS, mp_context=multiprocessing.get_context("forkserver")
+        )
+    return _parse_pool
+
+
+def shutdown_parse_pool():
+    """Shut down the feed parsing worker pool, if it was started"""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+
+def parse_feed(content: bytes, feed_url: str) -> List[Dict[str, Any]]:
+    """
+    Parse a raw RSS/Atom document into article dicts.
+
+    Runs inside the parse pool, so it must stay a module-level function and
+    return only plain, picklable data.
+    """
+    return feed_entries(feedparser.parse(content), feed_url.split('/')[2])
+
+
+def feed_entries(feed, source: str) -> List[Dict[str, Any]]:
+    """Article dicts for the entries of a parsed feed"""
+    feed_articles = []
+    for entry in feed.entries:
+        # Attempt to extract image URL from various fields
+        image_url = None
+        if 'media_content' in entry and entry.media_content:
+            image_url = entry.media_content[0].get('url')
+        elif 'media_thumbnail' in entry and entry.media_thumbnail:
+            image_url = entry.media_thumbnail[0].get('url')
+        elif 'enclosures' in entry and entry.enclosures:
+            image_url = entry.enclosures[0].get('href')
+        else:
+            # Fallback: try to extract from the description using regex.
+            desc = getattr(entry, 'description', '')
+            match = IMG_SRC_RE.search(desc)
+            if match:
+                image_url = match.group(1)
+
+        published_parsed = getattr(entry, 'published_parsed', None)
+        feed_articles.append({
+            'title': entry.title,
+            'description': getattr(entry, 'description', ''),
+            'url': entry.link,
+            'published_at': datetime(*published_parsed[:6]) if published_parsed else datetime.now(),
+            'source': source,
+            'image_url': image_url  # now set, if found
+        })
+    return feed_articles
+
+
+async def cancel_collection():
+    """Cancel a running collection, e.g. on shutdown"""
+    if _collection_task is not None and not _collection_task.done():
+        _collection_task.cancel()
+        await asyncio.gather(_collection_task, return_exceptions=True)
+
+
+def _log_collection_result(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"News collection failed: {task.exception()}")
+
+
 class NewsCollector:
     def __init__(self):
         self.newsapi = NewsApiClient(api_key=os.getenv('NEWS_API_KEY'))
@@ -38,6 +135,10 @@ class NewsCollector:
 
         self.reddit_client = None  # Initialize if needed
 
+        # Incremental parsing needs lxml; otherwise feedparser runs in the parse pool
+        self.stream_parse = RSS_STREAM_PARSE and stream_parser_available()
+        self._seen_urls: Dict[str, Set[str]] = {}
+
     async def get_available_sources(self) -> List[str]:
         """Get list of available news sources"""
         sources = []
@@ -64,7 +165,6 @@ class NewsCollector:
 
     async def fetch_rss_articles(self) -> List[Dict[str, Any]]:
         """Fetch articles from RSS feeds"""
-        import re
         articles = []
         async with aiohttp.ClientSession() as session:
             for feed_url in self.rss_feeds:
@@ -72,46 +172,52 @@ class NewsCollector:
                     logger.info(f"Fetching RSS feed: {feed_url}")
                     async with session.get(feed_url) as response:
                         if response.status == 200:
-                            content = await response.text()
-                            feed = feedparser.parse(content)
-                            feed_articles = []
-                            for entry in feed.entries:
-                                # Attempt to extract image URL from various fields
-                                image_url = None
-                                if 'media_content' in entry and entry.media_content:
-                                    image_url = entry.media_content[0].get('url')
-                                elif 'media_thumbnail' in entry and entry.media_thumbnail:
-                                    image_url = entry.media_thumbnail[0].get('url')
-                                elif 'enclosures' in entry and entry.enclosures:
-                                    image_url = entry.enclosures[0].get('href')
-                                else:
-                                    # Fallback: try to extract from the description using regex.
-                                    desc = getattr(entry, 'description', '')
-                                    match = re.search(r'<img\s+[^>]*src=[\'"]([^\'"]+)[\'"]', desc)
-                                    if match:
-                                        image_url = match.group(1)
-
-                                feed_articles.append({
-                                    'title': entry.title,
-                                    'description': getattr(entry, 'description', ''),
-                                    'url': entry.link,
-                                    'published_at': datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-                                    'source': feed_url.split('/')[2],
-                                    'image_url': image_url  # now set, if found
-                                })
+                            if self.stream_parse:
+                                feed_articles = await self._parse_feed_stream(response, feed_url)
+                            else:
+                                # Hand the raw bytes to feedparser (it handles encoding
+                                # detection) and keep the CPU-bound parse off the event loop.
+                                content = await response.read()
+                                loop = asyncio.get_running_loop()
+                                feed_articles = await loop.run_in_executor(
+                                    get_parse_pool(), parse_feed, content, feed_url
+                                )
+                            self._remember_seen(feed_url, feed_articles)
                             articles.extend(feed_articles)
                             logger.info(f"Fetched {len(feed_articles)} articles from {feed_url}")
                 except Exception as e:
                     logger.error(f"Error fetching RSS feed {feed_url}: {e}")
         return articles
 
+    async def _parse_feed_stream(self, response, feed_url: str) -> List[Dict[str, Any]]:
+        """Parse a feed incrementally as chunks arrive, stopping at already-seen entries"""
+        parser = FeedStreamParser(feed_url, self._seen_urls.get(feed_url))
+        feed_articles = []
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            feed_articles.extend(parser.feed(chunk))
+            if parser.done:
+                logger.info(f"Reached already-seen entries in {feed_url}, stopping early")
+                break
+        feed_articles.extend(parser.close())
+        return feed_articles
 
+    def _remember_seen(self, feed_url: str, feed_articles: List[Dict[str, Any]]):
+        """Track recently seen entry URLs per feed so the stream parser can stop early"""
+        seen = self._seen_urls.get(feed_url, set())
+        urls = {article['url'] for article in feed_articles}
+        if len(seen) + len(urls) > MAX_SEEN_URLS_PER_FEED:
+            seen = set()
+        seen.update(urls)
+        self._seen_urls[feed_url] = seen
 
     async def process_and_store_articles(self, articles: List[Dict[str, Any]]):
         """Process and store articles in the database"""
         db = await get_database()
         stored_count = 0
-        for article in articles:
+        languages = detect_languages([
+            f"{article.get('title') or ''} {article.get('description') or ''}" for article in articles
+        ])
+        for article, language in zip(articles, languages):
             try:     
                     # Create NewsArticle object
                     news_article = NewsArticle(
@@ -122,7 +228,8 @@ class NewsCollector:
                         source=article.get('source', 'unknown'),
                         content=article.get('content', ''),
                         author=article.get('author', ''),
-                        image_url=article.get('urlToImage', '')
+                        image_url=article.get('urlToImage', ''),
+                        language=language
                     )
                     # Store in database
                     await db.news.update_one(
@@ -136,17 +243,62 @@ class NewsCollector:
                 logger.error(f"Error processing article: {e}")
         logger.info(f"Stored {stored_count} new articles in database")
 
-    async def collect_news(self):
-        """Main method to collect news from all sources"""
+    async def _collect_news(self):
+        """Collect news from all sources"""
+        global _collection_finished_at, _collection_duration
         logger.info("Starting news collection...")
-        # Fetch from NewsAPI
-        newsapi_articles = await self.fetch_newsapi_articles()
-        # Fetch from RSS feeds
-        rss_articles = await self.fetch_rss_articles()
-        # Combine and process all articles
-        all_articles = newsapi_articles + rss_articles
-        logger.info(f"Total articles collected: {len(all_articles)}")
-        await self.process_and_store_articles(all_articles)
+        try:
+            # Fetch from NewsAPI
+            newsapi_articles = await self.fetch_newsapi_articles()
+            # Fetch from RSS feeds
+            rss_articles = await self.fetch_rss_articles()
+            # Combine and process all articles
+            all_articles = newsapi_articles + rss_articles
+            logger.info(f"Total articles collected: {len(all_articles)}")
+            await self.process_and_store_articles(all_articles)
+        finally:
+            _collection_finished_at = time.monotonic()
+            _collection_duration = _collection_finished_at - _collection_started_at
+
+    def _start_collection(self) -> asyncio.Task:
+        global _collection_task, _collection_started_at
+        if _collection_task is None or _collection_task.done():
+            _collection_started_at = time.monotonic()
+            _collection_task = asyncio.create_task(self._collect_news())
+            _collection_task.add_done_callback(_log_collection_result)
+        return _collection_task
+
+    async def collect_news(self):
+        """
+        Main method to collect news from all sources.
+
+        If a collection is already running, waits for it instead of starting
+        another one.
+        """
+        await asyncio.shield(self._start_collection())
+
+    def refresh_status(self) -> Dict[str, Any]:
+        """Whether a collection is running or cooling down, and when to retry"""
+        now = time.monotonic()
+        if _collection_task is not None and not _collection_task.done():
+            remaining = _collection_duration - (now - _collection_started_at)
+            return {"status": "running", "retry_after": max(int(remaining), 5)}
+        if _collection_finished_at and now - _collection_finished_at < COLLECTION_COOLDOWN:
+            remaining = COLLECTION_COOLDOWN - (now - _collection_finished_at)
+            return {"status": "cooldown", "retry_after": max(int(remaining), 1)}
+        return {"status": "idle", "retry_after": 0}
+
+    def request_refresh(self) -> Dict[str, Any]:
+        """
+        Ask for a background collection without waiting for it.
+
+        Starts one only if none is running and the cooldown has passed, then
+        returns refresh_status() for the caller to pass on as a hint.
+        """
+        if self.refresh_status()["status"] == "idle":
+            logger.info("Starting on-demand news collection")
+            self._start_collection()
+        return self.refresh_status()
 
     async def start_collection_scheduler(self):
         """Start the news collection scheduler"""
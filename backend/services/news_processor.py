@@ -1,8 +1,13 @@
 import spacy
 import nltk
 from typing import List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from database.mongodb import get_database
+from services.entity_dictionary import entity_dictionary
+from services.trend_detector import trend_detector
+from services.vector_index import vector_index
+from services.language_detector import detect_language, SCRIPT_LANGUAGE_CODES
+from services.alert_matcher import alert_matcher
 import asyncio
 import logging
 # Download required NLTK data
@@ -13,9 +18,51 @@ nltk.download('wordnet')
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Version of each analysis stage. Bump a stage's version whenever its logic
+# changes (e.g. the category keywords or sentiment lexicon); the reprocessing
+# sweep then recomputes only that stage on already-processed articles.
+ANALYSIS_VERSIONS = {
+    "language": 2,
+    "entities": 1,
+    "category": 1,
+    "sentiment": 1,
+}
+# Stages that existed before versioning was introduced
+LEGACY_STAGES = ("entities", "category", "sentiment")
+
+# Processed articles are matched against saved searches in groups of this size
+ALERT_MATCH_BATCH = 100
+
+# Languages the spaCy pipeline and the keyword lexicons are written for.
+# Other languages skip NER and get the neutral sentiment default.
+NLP_LANGUAGES = {"en"}
+NEUTRAL_SENTIMENT = {"positive": 0.5, "negative": 0.5, "neutral": 1.0}
+
+
+def stored_versions(article: Dict[str, Any]) -> Dict[str, int]:
+    """Stage versions an article was processed with"""
+    if "analysis_versions" in article:
+        return article["analysis_versions"]
+    if article.get("processed_at") is not None:
+        # Processed before stages were versioned: that logic is version 1
+        return {stage: 1 for stage in LEGACY_STAGES}
+    return {}
+
+
+def stale_stages(article: Dict[str, Any]) -> List[str]:
+    """Stages whose stored output is missing or was produced by an older version"""
+    versions = stored_versions(article)
+    return [stage for stage, version in ANALYSIS_VERSIONS.items() if versions.get(stage) != version]
+
+
 class NewsProcessor:
     def __init__(self):
         self.nlp = spacy.load("en_core_web_sm")
+        # Interns extracted entities into shared dictionary IDs (cached in memory)
+        self.entity_dictionary = entity_dictionary
+        # New writes never store full entity dicts, so once a pass finds none
+        # the (unindexed) legacy query is not worth running again
+        self.legacy_entities_compacted = False
         self.categories = [
             "politics", "technology", "business", "sports",
             "entertainment", "health", "science", "world"
@@ -68,7 +115,8 @@ class NewsProcessor:
 
     def analyze_sentiment(self, text: str) -> Dict[str, float]:
         """Perform basic sentiment analysis"""
-        doc = self.nlp(text)
+        # Only tokens are needed, so skip the tagger/parser/NER pipeline
+        doc = self.nlp.tokenizer(text)
         
         # Simple sentiment analysis based on positive/negative word lists
         positive_words = {"good", "great", "excellent", "positive", "success", "win"}
@@ -79,7 +127,7 @@ class NewsProcessor:
         total_count = positive_count + negative_count
         
         if total_count == 0:
-            return {"positive": 0.5, "negative": 0.5, "neutral": 1.0}
+            return dict(NEUTRAL_SENTIMENT)
         
         positive_score = positive_count / total_count
         negative_score = negative_count / total_count
@@ -91,21 +139,48 @@ class NewsProcessor:
             "neutral": neutral_score
         }
 
-    async def process_article(self, article: Dict[str, Any]) -> Dict[str, Any]:
-        """Process a single article with all analysis methods"""
+    async def analyze_stages(self, article: Dict[str, Any], stages: List[str]) -> Dict[str, Any]:
+        """Run only the given analysis stages and return the fields they produce"""
         # Combine title and description for analysis
         text = f"{article['title']} {article.get('description', '')}"
-        
+        results = {}
+        language = article.get("language")
+        if "language" in stages or not language:
+            language = results["language"] = detect_language(text)
+        supported = language in NLP_LANGUAGES
+        # Routing normally only applies to stages being (re)computed, so a
+        # backfilled Latin-script guess never clears stored output. A script
+        # match is certain, though: entities and sentiment stored for it came
+        # from the English pipeline and are replaced by the routed defaults.
+        if "language" in stages and not supported and language in SCRIPT_LANGUAGE_CODES:
+            stages = [*stages, *(stage for stage in ("entities", "sentiment") if stage not in stages)]
+        if "entities" in stages:
+            entities = self.extract_entities(text) if supported else []
+            results["entity_refs"] = await self.entity_dictionary.intern(entities)
+        if "category" in stages:
+            results["category"] = self.categorize_article(article['title'], article.get('description', ''))
+        if "sentiment" in stages:
+            results["sentiment"] = self.analyze_sentiment(text) if supported else dict(NEUTRAL_SENTIMENT)
+        return results
+
+    async def process_article(self, article: Dict[str, Any]) -> Dict[str, Any]:
+        """Process a single article with all analysis methods"""
         # Perform analysis
-        entities = self.extract_entities(text)
-        category = self.categorize_article(article['title'], article.get('description', ''))
-        sentiment = self.analyze_sentiment(text)
+        results = await self.analyze_stages(article, list(ANALYSIS_VERSIONS))
         
+        # Feed newly extracted entities to the trending detector
+        published_at = article.get("published_at")
+        if isinstance(published_at, datetime):
+            # Stored dates are naive UTC; bucket mentions by publication time
+            trend_detector.observe(
+                (ref[0] for ref in results["entity_refs"]),
+                published_at.replace(tzinfo=timezone.utc).timestamp()
+            )
+
         # Update article with analysis results
+        article.update(results)
         article.update({
-            "entities": entities,
-            "category": category,
-            "sentiment": sentiment,
+            "analysis_versions": dict(ANALYSIS_VERSIONS),
             "processed_at": datetime.now()
         })
         
@@ -116,28 +191,70 @@ class NewsProcessor:
         db = await get_database()
         unprocessed = await db.news.find({"processed_at": None}).to_list(length=None)
         logger.info(f"Found {len(unprocessed)} unprocessed articles.")
+        committed = []
         for article in unprocessed:
             try:
                 processed_article = await self.process_article(article)
                 await db.news.update_one(
                     {"_id": article["_id"]},
-                    {"$set": {
-                        "entities": processed_article["entities"],
-                        "category": processed_article["category"],
-                        "sentiment": processed_article["sentiment"],
-                        "processed_at": processed_article["processed_at"]
-                    }}
+                    {
+                        "$set": {
+                            "language": processed_article["language"],
+                            "entity_refs": processed_article["entity_refs"],
+                            "category": processed_article["category"],
+                            "sentiment": processed_article["sentiment"],
+                            "analysis_versions": processed_article["analysis_versions"],
+                            "processed_at": processed_article["processed_at"]
+                        },
+                        "$unset": {"entities": ""}
+                    }
                 )
+                # Index the committed article for related-article lookups
+                vector_index.add(processed_article)
+                committed.append(processed_article)
                 logger.info(f"Processed article: {article.get('title', 'Unknown')}")
             except Exception as e:
                 logger.error(f"Error processing article {article.get('title', 'Unknown')}: {e}")
+            if len(committed) >= ALERT_MATCH_BATCH:
+                await self._send_alerts(committed)
+                committed = []
+        if committed:
+            await self._send_alerts(committed)
 
+    async def _send_alerts(self, articles: List[Dict[str, Any]]):
+        """Notify saved searches; failures must not hold up processing"""
+        try:
+            await alert_matcher.notify(articles)
+        except Exception as e:
+            logger.error(f"Error matching saved searches: {e}")
+
+    async def compact_legacy_entities(self, batch_size: int = 500) -> int:
+        """Convert a batch of articles still storing full entity dicts to entity_refs"""
+        if self.legacy_entities_compacted:
+            return 0
+        db = await get_database()
+        legacy = await db.news.find(
+            {"entities.0": {"$exists": True}},
+            projection={"entities": 1}
+        ).limit(batch_size).to_list(length=batch_size)
+        for article in legacy:
+            entity_refs = await self.entity_dictionary.intern(article["entities"])
+            await db.news.update_one(
+                {"_id": article["_id"]},
+                {"$set": {"entity_refs": entity_refs}, "$unset": {"entities": ""}}
+            )
+        if legacy:
+            logger.info(f"Compacted entities for {len(legacy)} legacy articles.")
+        else:
+            self.legacy_entities_compacted = True
+        return len(legacy)
 
     async def start_processing_loop(self, interval: int = 300):
         logger.info("News processing loop started successfully.")
         while True:
             try:
                 await self.process_all_articles()
+                await self.compact_legacy_entities()
             except Exception as e:
                 logger.error(f"Error in processing loop: {e}")
             await asyncio.sleep(interval)
@@ -0,0 +1,228 @@
+import os
+import math
+import time
+import heapq
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from database.mongodb import get_database
+from services.hot_store import hot_store, HotArticle
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FEED_CANDIDATES_PER_LIST = int(os.getenv("FEED_CANDIDATES_PER_LIST", "200"))
+FEED_REFRESH_INTERVAL = int(os.getenv("FEED_REFRESH_INTERVAL", "60"))
+FEED_CACHE_TTL = int(os.getenv("FEED_CACHE_TTL", "60"))
+# Preferences of users idle this long are dropped and rebuilt from user_events
+PREFERENCE_IDLE_TTL = int(os.getenv("PREFERENCE_IDLE_TTL", "3600"))
+# Half-lives for article freshness and for decaying old clicks
+RECENCY_HALF_LIFE = 12 * 3600
+PREFERENCE_HALF_LIFE = 7 * 86400
+CATEGORY_WEIGHT = 1.0
+SOURCE_WEIGHT = 0.5
+REGION_BOOST = 0.5
+HISTORY_EVENTS = 200
+
+GLOBAL_REGION = "GLOBAL"
+
+# Region of each RSS source; NewsAPI and unknown sources are global
+SOURCE_REGIONS = {
+    "timesofindia.indiatimes.com": "IN",
+    "feeds.feedburner.com": "IN",
+    "indianexpress.com": "IN",
+    "www.indiatoday.in": "IN",
+    "www.thehindu.com": "IN",
+    "economictimes.indiatimes.com": "IN",
+    "www.hindustantimes.com": "IN",
+}
+
+# Normalized UserBase.country values mapped to regions
+COUNTRY_REGIONS = {
+    "india": "IN",
+    "in": "IN",
+    "ind": "IN",
+    "bharat": "IN",
+}
+
+
+def source_region(source: Optional[str]) -> str:
+    return SOURCE_REGIONS.get(source or "", GLOBAL_REGION)
+
+
+def country_region(country: Optional[str]) -> str:
+    return COUNTRY_REGIONS.get((country or "").strip().lower(), GLOBAL_REGION)
+
+
+class UserPreferences:
+    """Exponentially decayed category/source click weights for one user"""
+    __slots__ = ("categories", "sources", "updated_at", "used_at")
+
+    def __init__(self):
+        self.categories: Dict[str, float] = defaultdict(float)
+        self.sources: Dict[str, float] = defaultdict(float)
+        self.updated_at = time.time()
+        self.used_at = self.updated_at
+
+    def _decay(self, now: float):
+        factor = 0.5 ** ((now - self.updated_at) / PREFERENCE_HALF_LIFE)
+        if factor < 0.999:
+            for weights in (self.categories, self.sources):
+                for key in weights:
+                    weights[key] *= factor
+        self.updated_at = now
+
+    def record(self, category: Optional[str], source: Optional[str], at: Optional[float] = None):
+        now = at or time.time()
+        if now >= self.updated_at:
+            self._decay(now)
+            weight = 1.0
+        else:
+            # Replaying history: weight the older click as if already decayed
+            weight = 0.5 ** ((self.updated_at - now) / PREFERENCE_HALF_LIFE)
+        if category:
+            self.categories[category.lower()] += weight
+        if source:
+            self.sources[source] += weight
+
+    def normalized(self) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """Weights scaled to [0, 1] so clicks shift ranking without swamping recency"""
+        def scale(weights):
+            top = max(weights.values(), default=0.0)
+            return {k: v / top for k, v in weights.items()} if top > 0 else {}
+        return scale(self.categories), scale(self.sources)
+
+
+class PersonalizedFeed:
+    """
+    Per-user ranked feed assembled from precomputed candidate lists.
+
+    Candidate lists of the newest articles per (region, category) are
+    materialized from the hot store on a timer. A request only scores those
+    candidates against the user's in-memory preference vector and region,
+    and the rendered result is cached per user for FEED_CACHE_TTL seconds.
+    """
+
+    def __init__(self):
+        self._candidates: Dict[Tuple[str, str], List[HotArticle]] = {}
+        self._preferences: Dict[str, UserPreferences] = {}
+        self._cache: Dict[str, Tuple[float, int, bytes]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._candidates)
+
+    def materialize(self):
+        """Rebuild the per-(region, category) candidate lists from the hot store"""
+        candidates = defaultdict(list)
+        for category in hot_store.categories():
+            for record in hot_store.by_category(category):
+                key = (source_region(record.source), category)
+                if len(candidates[key]) < FEED_CANDIDATES_PER_LIST:
+                    candidates[key].append(record)
+        self._candidates = dict(candidates)
+
+    async def _preferences_for(self, user_id: str) -> UserPreferences:
+        preferences = self._preferences.get(user_id)
+        if preferences is None:
+            # Rebuild from recent click history after a restart
+            preferences = UserPreferences()
+            preferences.updated_at = 0.0
+            db = await get_database()
+            events = await db.user_events.find(
+                {"user_id": user_id, "type": "click"}
+            ).sort("created_at", -1).limit(HISTORY_EVENTS).to_list(length=HISTORY_EVENTS)
+            for event in reversed(events):
+                preferences.record(event.get("category"), event.get("source"), event["created_at"].timestamp())
+            self._preferences[user_id] = preferences
+        preferences.used_at = time.time()
+        return preferences
+
+    async def record_click(self, user_id: str, article_id: str) -> bool:
+        """Record that a user opened an article; returns False if it does not exist"""
+        record = hot_store.get(article_id)
+        if record is not None:
+            category, source = record.category, record.source
+        else:
+            try:
+                object_id = ObjectId(article_id)
+            except InvalidId:
+                return False
+            db = await get_database()
+            article = await db.news.find_one({"_id": object_id}, projection={"category": 1, "source": 1})
+            if article is None:
+                return False
+            category, source = article.get("category"), article.get("source")
+
+        preferences = await self._preferences_for(user_id)
+        preferences.record(category, source)
+        self._cache.pop(user_id, None)
+
+        db = await get_database()
+        await db.user_events.insert_one({
+            "user_id": user_id,
+            "type": "click",
+            "article_id": article_id,
+            "category": category,
+            "source": source,
+            "created_at": datetime.now()
+        })
+        return True
+
+    async def feed(self, user_id: str, country: Optional[str], limit: int) -> Optional[bytes]:
+        """Rendered feed for a user, or None if candidates are not materialized yet"""
+        if not self.ready:
+            return None
+        now = time.time()
+        cached = self._cache.get(user_id)
+        if cached is not None and cached[0] > now and cached[1] == limit:
+            return cached[2]
+
+        preferences = await self._preferences_for(user_id)
+        category_prefs, source_prefs = preferences.normalized()
+        region = country_region(country)
+
+        def score(record: HotArticle) -> float:
+            age = max(now - record.published_at, 0.0)
+            recency = math.exp(-age * math.log(2) / RECENCY_HALF_LIFE)
+            affinity = (
+                1.0
+                + CATEGORY_WEIGHT * category_prefs.get(record.category, 0.0)
+                + SOURCE_WEIGHT * source_prefs.get(record.source, 0.0)
+            )
+            if region != GLOBAL_REGION and source_region(record.source) == region:
+                affinity += REGION_BOOST
+            return recency * affinity
+
+        pool = []
+        for (list_region, _), records in self._candidates.items():
+            if list_region in (region, GLOBAL_REGION):
+                pool.extend(records)
+        ranked = heapq.nlargest(limit, pool, key=score)
+
+        body = hot_store.render(ranked)
+        self._cache[user_id] = (now + FEED_CACHE_TTL, limit, body)
+        return body
+
+    async def start_refresh_loop(self, interval: int = FEED_REFRESH_INTERVAL):
+        logger.info("Personalized feed refresh loop started.")
+        while True:
+            try:
+                if hot_store.loaded:
+                    self.materialize()
+                    # Expired entries are only evicted here to keep requests cheap
+                    now = time.time()
+                    self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+                    self._preferences = {
+                        k: v for k, v in self._preferences.items() if now - v.used_at < PREFERENCE_IDLE_TTL
+                    }
+            except Exception as e:
+                logger.error(f"Error materializing feed candidates: {e}")
+            await asyncio.sleep(interval)
+
+
+personalized_feed = PersonalizedFeed()
@@ -0,0 +1,157 @@
+import os
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from database.mongodb import get_database
+from services.news_processor import NewsProcessor, ANALYSIS_VERSIONS, stale_stages
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPROCESS_BATCH_SIZE = int(os.getenv("REPROCESS_BATCH_SIZE", "200"))
+# Pause between batches so the sweep never monopolizes the event loop
+REPROCESS_PAUSE = float(os.getenv("REPROCESS_PAUSE", "1.0"))
+CHECKPOINT_ID = "reprocess"
+
+
+def stale_query() -> Dict[str, Any]:
+    """Processed articles whose stored stage versions may be out of date"""
+    return {
+        "processed_at": {"$ne": None},
+        "$or": [
+            {f"analysis_versions.{stage}": {"$ne": version}}
+            for stage, version in ANALYSIS_VERSIONS.items()
+        ]
+    }
+
+
+class Reprocessor:
+    """
+    Resumable background sweep that brings processed articles up to the
+    current ANALYSIS_VERSIONS.
+
+    Articles are visited in ``_id`` order and only their stale stages are
+    recomputed, so bumping the category version never re-runs NER. Progress
+    is checkpointed in the ``jobs`` collection after every batch, and the
+    sweep slows down whenever freshly collected articles are waiting for the
+    regular processing loop. Once a sweep towards the current versions has
+    completed, later runs only retry the articles it failed on, since live
+    processing always writes current versions.
+    """
+
+    def __init__(self, processor: NewsProcessor, batch_size: int = REPROCESS_BATCH_SIZE,
+                 pause: float = REPROCESS_PAUSE):
+        self.processor = processor
+        self.batch_size = batch_size
+        self.pause = pause
+
+    async def _load_checkpoint(self, db) -> Optional[Dict[str, Any]]:
+        checkpoint = await db.jobs.find_one({"_id": CHECKPOINT_ID})
+        # A checkpoint from a sweep towards different versions is useless
+        if checkpoint and checkpoint.get("versions") == ANALYSIS_VERSIONS:
+            return checkpoint
+        return None
+
+    async def _save_checkpoint(self, db, last_id, failed: List[Any], completed: bool = False):
+        await db.jobs.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {
+                "last_id": last_id,
+                "versions": dict(ANALYSIS_VERSIONS),
+                "completed": completed,
+                "failed": failed,
+                "updated_at": datetime.now()
+            }},
+            upsert=True
+        )
+
+    async def _reprocess(self, db, article: Dict[str, Any]) -> bool:
+        try:
+            stages = stale_stages(article)
+            results = await self.processor.analyze_stages(article, stages) if stages else {}
+            versions = dict(ANALYSIS_VERSIONS)
+            update = {"$set": {**results, "analysis_versions": versions}}
+            if results:
+                update["$set"]["processed_at"] = datetime.now()
+            if "entity_refs" in results:
+                update["$unset"] = {"entities": ""}
+            await db.news.update_one({"_id": article["_id"]}, update)
+            return True
+        except Exception as e:
+            logger.error(f"Error reprocessing article {article.get('title', 'Unknown')}: {e}")
+            return False
+
+    async def _retry_failed(self, db, checkpoint: Dict[str, Any]) -> int:
+        """Retry the articles a completed sweep failed on, looked up by _id"""
+        failed = checkpoint.get("failed") or []
+        if not failed:
+            return 0
+        query = stale_query()
+        query["_id"] = {"$in": failed}
+        still_failed = []
+        updated = 0
+        async for article in db.news.find(query):
+            if await self._reprocess(db, article):
+                updated += 1
+            else:
+                still_failed.append(article["_id"])
+            await asyncio.sleep(0)
+        await self._save_checkpoint(db, checkpoint.get("last_id"), still_failed, completed=True)
+        if updated:
+            logger.info(f"Reprocessed {updated} previously failed articles.")
+        return updated
+
+    async def _live_backlog(self, db) -> bool:
+        return await db.news.find_one({"processed_at": None}, projection={"_id": 1}) is not None
+
+    async def run_sweep(self) -> int:
+        """Reprocess stale articles until none are left; returns the number updated"""
+        db = await get_database()
+        checkpoint = await self._load_checkpoint(db)
+        if checkpoint is not None and checkpoint.get("completed"):
+            return await self._retry_failed(db, checkpoint)
+        last_id = checkpoint.get("last_id") if checkpoint else None
+        failed = list(checkpoint.get("failed") or []) if checkpoint else []
+        if last_id is not None:
+            logger.info(f"Resuming reprocessing sweep after {last_id}")
+        updated = 0
+        while True:
+            if await self._live_backlog(db):
+                # Live ingestion takes priority: slow down rather than stop, so
+                # an article that keeps failing cannot stall the sweep forever.
+                await asyncio.sleep(self.pause * 10)
+
+            query = stale_query()
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            batch = await db.news.find(query).sort("_id", 1).limit(self.batch_size).to_list(length=self.batch_size)
+            if not batch:
+                await self._save_checkpoint(db, last_id, failed, completed=True)
+                break
+
+            for article in batch:
+                if await self._reprocess(db, article):
+                    updated += 1
+                else:
+                    failed.append(article["_id"])
+                # Yield between articles; the NLP work itself is synchronous
+                await asyncio.sleep(0)
+
+            last_id = batch[-1]["_id"]
+            await self._save_checkpoint(db, last_id, failed)
+            logger.info(f"Reprocessed {updated} articles so far (checkpoint {last_id})")
+            await asyncio.sleep(self.pause)
+
+        if updated:
+            logger.info(f"Reprocessing sweep complete: {updated} articles updated.")
+        return updated
+
+    async def start_sweep_loop(self, interval: int = 3600):
+        logger.info(f"Reprocessing sweep loop started (versions: {ANALYSIS_VERSIONS}).")
+        while True:
+            try:
+                await self.run_sweep()
+            except Exception as e:
+                logger.error(f"Error in reprocessing sweep: {e}")
+            await asyncio.sleep(interval)
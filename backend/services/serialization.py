@@ -0,0 +1,92 @@
+from typing import List, Dict, Any, Iterable, Optional
+from bson import ObjectId
+from fastapi import Response
+from models.news import NewsArticle
+import orjson
+
+# Fields exposed by the list endpoints, in NewsArticle order
+ARTICLE_FIELDS = tuple(NewsArticle.__fields__)
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Encode to JSON with orjson; datetimes are native, ObjectIds become strings"""
+    return orjson.dumps(value, default=_default)
+
+
+def compact_entities(entities):
+    """Drop character offsets from entity dicts"""
+    if not entities:
+        return entities
+    return [{"text": e["text"], "label": e["label"]} for e in entities]
+
+
+def article_to_dict(doc: Dict[str, Any], compact: bool = False,
+                    include_entities: bool = False) -> Dict[str, Any]:
+    """
+    Shape a stored article document for the API without building a model.
+
+    Stored documents are validated through NewsArticle when they are written,
+    so the read path only needs to project the public fields. Entities are
+    only included when requested and must already be expanded from
+    ``entity_refs`` (see EntityDictionary.expand_documents).
+    """
+    article = {field: doc.get(field) for field in ARTICLE_FIELDS}
+    if not include_entities:
+        article["entities"] = None
+    elif compact:
+        article["entities"] = compact_entities(article["entities"])
+    return article
+
+
+def serialize_article_head(doc: Dict[str, Any]) -> bytes:
+    """
+    Validate an article once and render it without its entities.
+
+    The returned fragment is missing its closing brace so the entities
+    member can be appended at response time (see with_entities).
+    """
+    article = NewsArticle(**doc).dict()
+    del article["entities"]
+    return dumps(article)[:-1]
+
+
+def serialize_entities(entities, compact: bool = False) -> Optional[bytes]:
+    if not entities:
+        return None
+    return dumps(compact_entities(entities) if compact else entities)
+
+
+def with_entities(head: bytes, entities: Optional[bytes]) -> bytes:
+    """Close an article head fragment with its (possibly null) entities member"""
+    return head + b',"entities":' + (entities or b"null") + b"}"
+
+
+def render_fragments(fragments: Iterable[bytes]) -> bytes:
+    """Assemble a JSON array from pre-rendered element fragments"""
+    return b"[" + b",".join(fragments) + b"]"
+
+
+class ArticleListResponse(Response):
+    """
+    JSON response that skips response_model validation and jsonable_encoder.
+
+    Returning a Response instance makes FastAPI bypass ``response_model``, so
+    the declared model still documents the schema but is not re-applied.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def article_list_response(docs: List[Dict[str, Any]], compact: bool = False,
+                          include_entities: bool = False) -> ArticleListResponse:
+    return ArticleListResponse(content=[article_to_dict(doc, compact, include_entities) for doc in docs])
@@ -0,0 +1,250 @@
+import os
+import math
+import time
+import asyncio
+from collections import Counter, deque
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional
+from database.mongodb import get_database
+from services.entity_dictionary import entity_dictionary
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rolling windows, in minutes
+TREND_WINDOWS = {"5m": 5, "1h": 60}
+# Half-life of the per-minute baseline rate each window is compared against
+TREND_BASELINE_HALF_LIFE = int(os.getenv("TREND_BASELINE_HALF_LIFE_MINUTES", "1440"))
+TREND_MIN_COUNT = int(os.getenv("TREND_MIN_COUNT", "3"))
+TREND_MAX_TRACKED = int(os.getenv("TREND_MAX_TRACKED", "50000"))
+TREND_TOP_K = 100
+TREND_CHECKPOINT_INTERVAL = 300
+CHECKPOINT_ID = "trend_detector"
+
+_DECAY = 0.5 ** (1 / TREND_BASELINE_HALF_LIFE)
+
+
+def _current_minute(now: Optional[float] = None) -> int:
+    return int((now or time.time()) // 60)
+
+
+class TrendDetector:
+    """
+    Streaming burst detector over extracted entities.
+
+    Mentions are counted exactly in per-minute buckets covering the largest
+    window, with a running total for the last hour (including the open
+    minute). When a minute closes, its counts are folded into an
+    exponentially decayed per-minute baseline for each entity, and every
+    window is re-ranked by how far its observed count exceeds the baseline
+    expectation. Requests read the precomputed ranking.
+    """
+
+    def __init__(self):
+        self._minute = _current_minute()
+        self._current = Counter()
+        self._buckets = deque()  # (minute, Counter) for closed minutes
+        self._hour = Counter()
+        # entity_id -> [rate per minute, minute of last update]
+        self._baseline: Dict[int, List[float]] = {}
+        self._rankings: Dict[str, List[Dict[str, Any]]] = {window: [] for window in TREND_WINDOWS}
+        self._dirty = False
+
+    def observe(self, entity_ids: Iterable[int], at: Optional[float] = None):
+        """
+        Count one article's entities (each entity once per article) in the
+        minute ``at`` (a Unix timestamp, normally the publication time).
+        Articles older than the largest window are ignored, and future
+        timestamps count towards the current minute.
+        """
+        self._advance(_current_minute())
+        minute = min(_current_minute(at), self._minute)
+        if minute <= self._minute - max(TREND_WINDOWS.values()):
+            return
+        if minute == self._minute:
+            bucket = self._current
+        else:
+            bucket = self._closed_bucket(minute)
+        late = bucket is not self._current
+        for entity_id in set(entity_ids):
+            bucket[entity_id] += 1
+            self._hour[entity_id] += 1
+            if late:
+                # The minute was already folded into the baseline
+                self._add_late_baseline(entity_id, 1, minute)
+        self._dirty = True
+
+    def _closed_bucket(self, minute: int) -> Counter:
+        """Bucket of an already closed minute, created in order if missing"""
+        for i in range(len(self._buckets) - 1, -1, -1):
+            bucket_minute, bucket = self._buckets[i]
+            if bucket_minute == minute:
+                return bucket
+            if bucket_minute < minute:
+                self._buckets.insert(i + 1, (minute, Counter()))
+                return self._buckets[i + 1][1]
+        self._buckets.appendleft((minute, Counter()))
+        return self._buckets[0][1]
+
+    def _advance(self, minute: int):
+        if minute <= self._minute:
+            return
+        # Close the current minute and fold it into the baseline
+        for entity_id, count in self._current.items():
+            self._update_baseline(entity_id, count, self._minute)
+        self._buckets.append((self._minute, self._current))
+        self._current = Counter()
+        self._minute = minute
+
+        horizon = minute - max(TREND_WINDOWS.values())
+        while self._buckets and self._buckets[0][0] <= horizon:
+            _, expired = self._buckets.popleft()
+            self._hour.subtract(expired)
+        self._hour += Counter()  # drop zero and negative counts
+        self._dirty = True
+
+    def _update_baseline(self, entity_id: int, count: int, minute: int):
+        entry = self._baseline.get(entity_id)
+        if entry is None:
+            self._baseline[entity_id] = [(1 - _DECAY) * count, minute]
+            return
+        rate, last = entry
+        entry[0] = rate * _DECAY ** (minute - last) + (1 - _DECAY) * count
+        entry[1] = minute
+
+    def _add_late_baseline(self, entity_id: int, count: int, minute: int):
+        """Fold a count for a past minute into the baseline without moving it forward"""
+        entry = self._baseline.get(entity_id)
+        if entry is None:
+            self._baseline[entity_id] = [(1 - _DECAY) * count, minute]
+            return
+        rate, last = entry
+        if minute >= last:
+            self._update_baseline(entity_id, count, minute)
+        else:
+            entry[0] = rate + (1 - _DECAY) * count * _DECAY ** (last - minute)
+
+    def _baseline_rate(self, entity_id: int, minute: int) -> float:
+        entry = self._baseline.get(entity_id)
+        if entry is None:
+            return 0.0
+        return entry[0] * _DECAY ** max(minute - entry[1], 0)
+
+    def _prune(self):
+        """Forget entities whose baseline has decayed away, and cap the total"""
+        minute = self._minute
+        stale = [
+            entity_id for entity_id in self._baseline
+            if entity_id not in self._hour and self._baseline_rate(entity_id, minute) < 1e-4
+        ]
+        for entity_id in stale:
+            del self._baseline[entity_id]
+        if len(self._baseline) > TREND_MAX_TRACKED:
+            keep = sorted(self._baseline, key=lambda e: self._baseline_rate(e, minute), reverse=True)
+            for entity_id in keep[TREND_MAX_TRACKED:]:
+                if entity_id not in self._hour:
+                    del self._baseline[entity_id]
+
+    def _window_counts(self, minutes: int) -> Counter:
+        if minutes == max(TREND_WINDOWS.values()):
+            # The running total already includes the open minute
+            return Counter(self._hour)
+        counts = Counter(self._current)
+        for minute, bucket in reversed(self._buckets):
+            if minute <= self._minute - minutes:
+                break
+            counts.update(bucket)
+        return counts
+
+    async def recompute(self):
+        """Re-rank every window; called once per minute by the tick loop"""
+        self._advance(_current_minute())
+        if not self._dirty:
+            return
+        self._prune()
+        minute = self._minute
+        rankings = {}
+        for window, minutes in TREND_WINDOWS.items():
+            scored = []
+            for entity_id, count in self._window_counts(minutes).items():
+                if count < TREND_MIN_COUNT:
+                    continue
+                expected = self._baseline_rate(entity_id, minute) * minutes
+                score = (count - expected) / math.sqrt(expected + 1)
+                if score > 0:
+                    scored.append((score, entity_id, count, expected))
+            scored.sort(reverse=True)
+            rankings[window] = scored[:TREND_TOP_K]
+
+        await entity_dictionary.prefetch(entity_id for ranked in rankings.values() for _, entity_id, _, _ in ranked)
+        for window, ranked in rankings.items():
+            entries = []
+            for score, entity_id, count, expected in ranked:
+                entry = entity_dictionary.lookup(entity_id)
+                if entry is None:
+                    continue
+                entries.append({
+                    "entity": f"{entry[0]} ({entry[1]})",
+                    "count": count,
+                    "expected": round(expected, 3),
+                    "score": round(score, 3)
+                })
+            self._rankings[window] = entries
+        self._dirty = False
+
+    def trending(self, window: str, limit: int) -> List[Dict[str, Any]]:
+        return self._rankings[window][:limit]
+
+    async def save_checkpoint(self):
+        db = await get_database()
+        await db.trend_state.replace_one(
+            {"_id": CHECKPOINT_ID},
+            {
+                "_id": CHECKPOINT_ID,
+                "minute": self._minute,
+                "current": [[k, v] for k, v in self._current.items()],
+                "buckets": [[m, [[k, v] for k, v in b.items()]] for m, b in self._buckets],
+                "baseline": [[k, v[0], v[1]] for k, v in self._baseline.items()],
+                "saved_at": datetime.now()
+            },
+            upsert=True
+        )
+
+    async def load_checkpoint(self):
+        db = await get_database()
+        state = await db.trend_state.find_one({"_id": CHECKPOINT_ID})
+        if state is None:
+            return
+        self._minute = state["minute"]
+        self._current = Counter(dict(state["current"]))
+        self._buckets = deque((m, Counter(dict(pairs))) for m, pairs in state["buckets"])
+        self._hour = Counter()
+        for _, bucket in self._buckets:
+            self._hour.update(bucket)
+        self._hour.update(self._current)
+        self._baseline = {k: [rate, minute] for k, rate, minute in state["baseline"]}
+        self._dirty = True
+        # Expire whatever fell out of the windows while we were down
+        self._advance(_current_minute())
+        logger.info(f"Restored trend state with {len(self._baseline)} tracked entities")
+
+    async def start_tick_loop(self, interval: int = 60):
+        logger.info("Trend detector loop started.")
+        try:
+            await self.load_checkpoint()
+        except Exception as e:
+            logger.error(f"Error restoring trend state: {e}")
+        last_checkpoint = time.time()
+        while True:
+            try:
+                await self.recompute()
+                if time.time() - last_checkpoint >= TREND_CHECKPOINT_INTERVAL:
+                    await self.save_checkpoint()
+                    last_checkpoint = time.time()
+            except Exception as e:
+                logger.error(f"Error in trend detector loop: {e}")
+            await asyncio.sleep(interval)
+
+
+trend_detector = TrendDetector()
@@ -0,0 +1,422 @@
+import os
+import re
+import math
+import time
+import zlib
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from database.mongodb import get_database
+from services.news_archiver import hot_cutoff
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "vector_index")
+VECTOR_INDEX_DAYS = int(os.getenv("VECTOR_INDEX_DAYS", "30"))
+VECTOR_DIM = 128
+HASH_DIM = 2 ** 14
+MIN_FIT_DOCS = 500
+FIT_SAMPLE_SIZE = 5000
+KMEANS_SAMPLE_SIZE = 20000
+KMEANS_ITERATIONS = 10
+NPROBE = 8
+INITIAL_CAPACITY = 4096
+# Compact once this share of the rows has expired
+COMPACT_EXPIRED_FRACTION = 0.1
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_TOKEN_RE = re.compile(r"\w+")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his in into is it its
+of on or said says she that the their they this to was were which will with
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    text = _TAG_RE.sub(" ", text).lower()
+    return [t for t in _TOKEN_RE.findall(text) if len(t) > 1 and t not in STOPWORDS]
+
+
+def article_text(article: Dict[str, Any]) -> str:
+    return " ".join(filter(None, (article.get("title"), article.get("description"), article.get("content"))))
+
+
+def hash_tokens(tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed term counts; crc32 keeps buckets stable across processes"""
+    if not tokens:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    buckets = np.fromiter((zlib.crc32(t.encode()) % HASH_DIM for t in tokens), dtype=np.int64, count=len(tokens))
+    indices, counts = np.unique(buckets, return_counts=True)
+    return indices, counts.astype(np.float32)
+
+
+class VectorIndex:
+    """
+    Local dense-vector index for "related articles".
+
+    Articles are embedded on CPU as hashed TF-IDF vectors projected to
+    VECTOR_DIM dimensions with a truncated SVD fitted on a sample. Vectors
+    live in a memory-mapped float32 matrix under VECTOR_INDEX_DIR and are
+    searched through an IVF (inverted file) index: k-means centroids
+    partition the vectors and a query only scans the NPROBE closest lists.
+    """
+
+    def __init__(self, directory: str = VECTOR_INDEX_DIR):
+        self.directory = directory
+        self.projection: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        self._df = np.zeros(HASH_DIM, dtype=np.int64)
+        self._n_docs = 0
+        self._vectors: Optional[np.memmap] = None
+        self._capacity = 0
+        self._count = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._timestamps = np.zeros(0, dtype=np.float64)
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._lists: List[List[int]] = []
+        self._trained_count = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.projection is not None
+
+    def __len__(self):
+        return self._count
+
+    # Embedding
+
+    def _tfidf(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        indices, counts = hash_tokens(tokens)
+        if not len(indices):
+            return indices, counts
+        idf = np.log((1 + self._n_docs) / (1 + self._df[indices])) + 1
+        values = (1 + np.log(counts)) * idf
+        return indices, (values / np.linalg.norm(values)).astype(np.float32)
+
+    def embed(self, article: Dict[str, Any]) -> Optional[np.ndarray]:
+        indices, values = self._tfidf(tokenize(article_text(article)))
+        if not len(indices):
+            return None
+        vector = values @ self.projection[indices]
+        norm = np.linalg.norm(vector)
+        return (vector / norm).astype(np.float32) if norm > 0 else None
+
+    def fit(self, articles: List[Dict[str, Any]]):
+        """Fit document frequencies and the SVD projection on a sample of articles"""
+        token_lists = [tokenize(article_text(a)) for a in articles]
+        self._df[:] = 0
+        for tokens in token_lists:
+            indices, _ = hash_tokens(tokens)
+            self._df[indices] += 1
+        self._n_docs = len(token_lists)
+        rows = [row for row in (self._tfidf(tokens) for tokens in token_lists) if len(row[0])]
+
+        # Randomized SVD over the sparse rows, without materializing them densely
+        rng = np.random.default_rng(0)
+        sketch = VECTOR_DIM + 10
+        omega = rng.standard_normal((HASH_DIM, sketch)).astype(np.float32)
+        y = np.stack([values @ omega[indices] for indices, values in rows])
+        q, _ = np.linalg.qr(y)
+        b = np.zeros((sketch, HASH_DIM), dtype=np.float32)
+        for i, (indices, values) in enumerate(rows):
+            b[:, indices] += np.outer(q[i], values)
+        _, _, vt = np.linalg.svd(b, full_matrices=False)
+        self.projection = np.ascontiguousarray(vt[:VECTOR_DIM].T, dtype=np.float32)
+        logger.info(f"Fitted vector projection on {len(rows)} articles")
+
+    # Storage
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= self._capacity:
+            return
+        capacity = max(INITIAL_CAPACITY, self._capacity)
+        while capacity < needed:
+            capacity *= 2
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, "vectors.f32")
+        if self._vectors is not None:
+            self._vectors.flush()
+        with open(path, "ab") as f:
+            f.truncate(capacity * VECTOR_DIM * 4)
+        # Map the grown file before swapping it in; compute_centroids may be
+        # reading the old mapping from a worker thread meanwhile
+        vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, VECTOR_DIM))
+        self._vectors = vectors
+        self._timestamps = np.resize(self._timestamps, capacity)
+        self._assignments = np.resize(self._assignments, capacity)
+        self._capacity = capacity
+
+    def add(self, article: Dict[str, Any], update_df: bool = True) -> bool:
+        """Embed and index an article (replacing any previous vector for it)"""
+        if not self.ready:
+            return False
+        article_id = str(article["_id"])
+        if update_df and article_id not in self._rows:
+            # Keep document frequencies current so new vocabulary gets an IDF
+            indices, _ = hash_tokens(tokenize(article_text(article)))
+            self._df[indices] += 1
+            self._n_docs += 1
+        vector = self.embed(article)
+        if vector is None:
+            return False
+
+        row = self._rows.get(article_id)
+        if row is None:
+            row = self._count
+            self._ensure_capacity(row + 1)
+            self._ids.append(article_id)
+            self._rows[article_id] = row
+            self._count += 1
+        elif self.centroids is not None:
+            self._lists[self._assignments[row]].remove(row)
+
+        self._vectors[row] = vector
+        published_at = article.get("published_at")
+        # Stored dates are naive UTC; timestamp() alone would read them as local time
+        self._timestamps[row] = (
+            published_at.replace(tzinfo=timezone.utc).timestamp() if isinstance(published_at, datetime) else time.time()
+        )
+        if self.centroids is not None:
+            cluster = int(np.argmax(self.centroids @ vector))
+            self._assignments[row] = cluster
+            self._lists[cluster].append(row)
+        return True
+
+    def compute_centroids(self) -> Optional[Tuple[np.ndarray, np.ndarray, int]]:
+        """
+        Spherical k-means over the current vectors.
+
+        Returns ``(centroids, assignments, n)`` for the first ``n`` rows. This
+        is CPU-heavy and meant to run in a worker thread; install the result
+        on the event loop with install_centroids().
+        """
+        n = self._count
+        if n < MIN_FIT_DOCS:
+            return None
+        vectors = self._vectors
+        nlist = int(min(1024, max(16, 4 * math.sqrt(n))))
+        rng = np.random.default_rng(0)
+        sample = np.asarray(vectors[np.sort(rng.choice(n, min(n, KMEANS_SAMPLE_SIZE), replace=False))])
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+                else:
+                    centroids[c] = sample[rng.integers(len(sample))]
+            centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+
+        assignments = np.empty(n, dtype=np.int32)
+        for start in range(0, n, 65536):
+            block = np.asarray(vectors[start:min(start + 65536, n)])
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return centroids.astype(np.float32), assignments, n
+
+    def install_centroids(self, centroids: np.ndarray, assignments: np.ndarray, n: int):
+        """Swap in new IVF lists, assigning any rows added while training ran"""
+        if self._count > n:
+            tail = np.asarray(self._vectors[n:self._count])
+            assignments = np.concatenate([assignments, np.argmax(tail @ centroids.T, axis=1).astype(np.int32)])
+        self._assignments[:len(assignments)] = assignments
+        self._lists = [[] for _ in range(len(centroids))]
+        for row, cluster in enumerate(assignments.tolist()):
+            self._lists[cluster].append(row)
+        self.centroids = centroids
+        self._trained_count = len(assignments)
+        logger.info(f"Trained IVF index with {len(centroids)} lists over {len(assignments)} vectors")
+
+    async def train(self):
+        result = await asyncio.to_thread(self.compute_centroids)
+        if result is not None:
+            self.install_centroids(*result)
+
+    @staticmethod
+    def expiry_cutoff() -> float:
+        """Rows published before this are past VECTOR_INDEX_DAYS or archived"""
+        return max(time.time() - VECTOR_INDEX_DAYS * 86400, hot_cutoff().timestamp())
+
+    def expired(self, cutoff: float) -> int:
+        return int(np.count_nonzero(self._timestamps[:self._count] < cutoff))
+
+    def compact(self, cutoff: float) -> int:
+        """
+        Drop rows published before ``cutoff`` and rebuild the IVF lists.
+
+        Search filters on recency only after probing, so expired rows left in
+        the lists crowd out the live ones. Kept rows only move down, which
+        lets the copy happen in place.
+        """
+        n = self._count
+        keep = np.flatnonzero(self._timestamps[:n] >= cutoff)
+        m = len(keep)
+        if m == n:
+            return 0
+        for start in range(0, m, 65536):
+            block = keep[start:start + 65536]
+            self._vectors[start:start + len(block)] = self._vectors[block]
+        self._timestamps[:m] = self._timestamps[keep]
+        self._assignments[:m] = self._assignments[keep]
+        self._ids = [self._ids[row] for row in keep.tolist()]
+        self._rows = {article_id: row for row, article_id in enumerate(self._ids)}
+        self._count = m
+        if self.centroids is not None:
+            self._lists = [[] for _ in range(len(self.centroids))]
+            for row, cluster in enumerate(self._assignments[:m].tolist()):
+                self._lists[cluster].append(row)
+            self._trained_count = min(self._trained_count, m)
+        logger.info(f"Compacted vector index: removed {n - m} expired vectors, {m} left")
+        return n - m
+
+    # Search
+
+    def search(self, vector: np.ndarray, k: int, since: float,
+               exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Top-k (article_id, similarity) pairs published at or after ``since``"""
+        if self._count == 0:
+            return []
+        if self.centroids is not None:
+            probes = np.argsort(self.centroids @ vector)[::-1][:NPROBE]
+            rows = np.fromiter(
+                (row for c in probes for row in self._lists[c]), dtype=np.int64
+            )
+        else:
+            rows = np.arange(self._count)
+        if not len(rows):
+            return []
+        rows = rows[self._timestamps[rows] >= since]
+        if not len(rows):
+            return []
+        scores = np.asarray(self._vectors[rows]) @ vector
+        order = np.argsort(scores)[::-1]
+        results = []
+        for i in order:
+            article_id = self._ids[rows[i]]
+            if article_id == exclude:
+                continue
+            results.append((article_id, float(scores[i])))
+            if len(results) >= k:
+                break
+        return results
+
+    def related(self, article: Dict[str, Any], k: int, days: int) -> List[Tuple[str, float]]:
+        article_id = str(article["_id"])
+        row = self._rows.get(article_id)
+        vector = np.asarray(self._vectors[row]) if row is not None else self.embed(article)
+        if vector is None:
+            return []
+        since = time.time() - days * 86400
+        return self.search(vector, k, since, exclude=article_id)
+
+    # Persistence
+
+    def snapshot(self) -> Optional[Dict[str, np.ndarray]]:
+        """Copy the index metadata so it can be written out off the event loop"""
+        if not self.ready:
+            return None
+        if self._vectors is not None:
+            self._vectors.flush()
+        n = self._count
+        return {
+            "ids": np.array(self._ids[:n], dtype="S24"),
+            "timestamps": self._timestamps[:n].copy(),
+            "assignments": self._assignments[:n].copy(),
+            "df": self._df.copy(),
+            "n_docs": np.array(self._n_docs),
+            "trained_count": np.array(self._trained_count),
+            "centroids": self.centroids if self.centroids is not None else np.zeros((0, VECTOR_DIM), np.float32)
+        }
+
+    def write_snapshot(self, snapshot: Dict[str, np.ndarray]):
+        os.makedirs(self.directory, exist_ok=True)
+        np.save(os.path.join(self.directory, "projection.npy"), self.projection)
+        tmp_path = os.path.join(self.directory, "meta.tmp.npz")
+        np.savez(tmp_path, **snapshot)
+        os.replace(tmp_path, os.path.join(self.directory, "meta.npz"))
+
+    async def save(self):
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            await asyncio.to_thread(self.write_snapshot, snapshot)
+
+    def load(self) -> bool:
+        projection_path = os.path.join(self.directory, "projection.npy")
+        meta_path = os.path.join(self.directory, "meta.npz")
+        if not (os.path.exists(projection_path) and os.path.exists(meta_path)):
+            return False
+        self.projection = np.load(projection_path)
+        meta = np.load(meta_path)
+        self._ids = [i.decode() for i in meta["ids"]]
+        self._rows = {article_id: row for row, article_id in enumerate(self._ids)}
+        self._count = len(self._ids)
+        self._df = meta["df"]
+        self._n_docs = int(meta["n_docs"])
+        self._trained_count = int(meta["trained_count"])
+        self._ensure_capacity(max(self._count, 1))
+        self._timestamps[:self._count] = meta["timestamps"]
+        self._assignments[:self._count] = meta["assignments"]
+        centroids = meta["centroids"]
+        if len(centroids):
+            self.centroids = centroids
+            self._lists = [[] for _ in range(len(centroids))]
+            for row in range(self._count):
+                self._lists[self._assignments[row]].append(row)
+        logger.info(f"Loaded vector index with {self._count} vectors")
+        return True
+
+    async def build(self):
+        """Fit on recent processed articles and index everything in the window"""
+        db = await get_database()
+        query = {
+            "processed_at": {"$ne": None},
+            "published_at": {"$gte": datetime.utcnow() - timedelta(days=VECTOR_INDEX_DAYS)}
+        }
+        projection = {"title": 1, "description": 1, "content": 1, "published_at": 1}
+        sample = await db.news.find(query, projection).sort("published_at", -1).limit(FIT_SAMPLE_SIZE).to_list(length=FIT_SAMPLE_SIZE)
+        if len(sample) < MIN_FIT_DOCS:
+            logger.info(f"Not enough articles to build vector index yet ({len(sample)}/{MIN_FIT_DOCS})")
+            return
+        await asyncio.to_thread(self.fit, sample)
+
+        added = 0
+        seen = 0
+        async for article in db.news.find(query, projection):
+            # Document frequencies come from the fitting sample here
+            if self.add(article, update_df=False):
+                added += 1
+            seen += 1
+            if seen % 1000 == 0:
+                await asyncio.sleep(0)
+        await self.train()
+        await self.save()
+        logger.info(f"Built vector index with {added} articles")
+
+    async def start_maintenance_loop(self, interval: int = 300):
+        logger.info("Vector index maintenance loop started.")
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Error loading vector index, rebuilding: {e}")
+        while True:
+            try:
+                if not self.ready:
+                    await self.build()
+                else:
+                    cutoff = self.expiry_cutoff()
+                    if self.expired(cutoff) > COMPACT_EXPIRED_FRACTION * self._count:
+                        self.compact(cutoff)
+                    # Retrain once the index has doubled since the last training
+                    if self._count >= max(MIN_FIT_DOCS, 2 * self._trained_count):
+                        await self.train()
+                    await self.save()
+            except Exception as e:
+                logger.error(f"Error maintaining vector index: {e}")
+            await asyncio.sleep(interval)
+
+
+vector_index = VectorIndex()